@@ -112,16 +112,18 @@ async def my_sys_sw_app(ig: int = None, iw: int = None, host_fm_conn_port: int =
     pci_cfg_size = 0x10000000  # assume bus bits n = 8
     memory_base_tracker = MemoryBaseTracker(cxl_hpa_base_addr, pci_cfg_base_addr, mmio_base)
 
+    mem_ranges = []
     for device in pci_bus_driver.get_devices():
         if not device.is_bridge:
             continue
 
-        cxl_memory_hub.add_mem_range(memory_base_tracker.cfg_base, pci_cfg_size, MEM_ADDR_TYPE.CFG)
+        mem_ranges.append((memory_base_tracker.cfg_base, pci_cfg_size, MEM_ADDR_TYPE.CFG))
         memory_base_tracker.cfg_base += pci_cfg_size
         for bar_info in device.bars:
             if bar_info.base_address == 0:
                 continue
-            cxl_memory_hub.add_mem_range(bar_info.base_address, bar_info.size, MEM_ADDR_TYPE.MMIO)
+            mem_ranges.append((bar_info.base_address, bar_info.size, MEM_ADDR_TYPE.MMIO))
+    cxl_memory_hub.add_mem_ranges(mem_ranges)
 
     ig = INTERLEAVE_GRANULARITY(int(ig)) if ig is not None else INTERLEAVE_GRANULARITY(0)
     iw = INTERLEAVE_WAYS(int(iw)) if iw is not None else INTERLEAVE_WAYS(0)
@@ -181,13 +183,12 @@ async def my_sys_sw_app(ig: int = None, iw: int = None, host_fm_conn_port: int =
             )
     else:
         # interleave disabled
-        for device in cxl_mem_driver.get_devices():
-            size = device.get_memory_size()
+        # sizes and vPPBs were already collected per device above
+        for device, size, vppb in zip(cxl_mem_driver.get_devices(), dev_mem_sizes, vppbs):
             successful = await cxl_mem_driver.attach_single_mem_device(
                 device, memory_base_tracker.hpa_base, size
             )
             sn = device.pci_device_info.serial_number
-            vppb = cxl_mem_driver.get_port_number(device)
             if not successful:
                 logger.info(f"[SYS-SW] Failed to attach device {device}")
                 continue
@@ -5,6 +5,7 @@ This software is licensed under the terms of the Revised BSD License.
 See LICENSE for details.
 """
 
+import asyncio
 import os
 import multiprocessing
 import logging
@@ -23,10 +24,17 @@ from opencis.bin import cxl_host
 from opencis.bin import mem
 from opencis.bin import packet_runner
 
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 
 @click.group()
 def cli():
-    pass
+    # Components inherit the loop policy, so they all run on uvloop when it is installed
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
 
 
 def validate_component(ctx, param, components):
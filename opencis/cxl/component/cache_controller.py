@@ -7,6 +7,7 @@ See LICENSE for details.
 
 from typing import Optional, Tuple, List
 from asyncio import create_task, gather
+from bisect import bisect_right
 from dataclasses import dataclass
 from enum import Enum, auto
 from math import log2
@@ -55,7 +56,7 @@ class COH_STATE_MACHINE(Enum):
     COH_STATE_DONE = auto()
 
 
-@dataclass
+@dataclass(slots=True)
 class CohStateMachine:
     state: COH_STATE_MACHINE
     packet: None
@@ -125,6 +126,10 @@ class CacheController(RunnableComponent):
         self._coh_bridge_to_cache_fifo = config.coh_bridge_to_cache_fifo
 
         self._memory_ranges: List[MemoryRange] = []
+        # sorted by base_addr for bisect lookups
+        self._range_starts: List[int] = []
+        self._sorted_ranges: List[MemoryRange] = []
+        self._ranges_overlap = False
 
         self.init_cache()
         logger.debug(self._create_message(f"{config.component_name} LLC Generated"))
@@ -145,11 +150,27 @@ class CacheController(RunnableComponent):
     def get_memory_ranges(self):
         return self._memory_ranges
 
+    # Ranges are expected not to overlap; overlapping ones fall back to a linear scan where
+    # the first added range wins
     def add_mem_range(self, addr: int, size: int, addr_type: MEM_ADDR_TYPE):
         logger.info(
             self._create_message(f"Adding MemoryRange addr: 0x{addr:x} addr_type: {addr_type.name}")
         )
         self._memory_ranges.append(MemoryRange(base_addr=addr, size=size, addr_type=addr_type))
+        self._update_range_index()
+
+    def add_mem_ranges(self, ranges: List[Tuple[int, int, MEM_ADDR_TYPE]]):
+        for addr, _, addr_type in ranges:
+            logger.info(
+                self._create_message(
+                    f"Adding MemoryRange addr: 0x{addr:x} addr_type: {addr_type.name}"
+                )
+            )
+        self._memory_ranges.extend(
+            MemoryRange(base_addr=addr, size=size, addr_type=addr_type)
+            for addr, size, addr_type in ranges
+        )
+        self._update_range_index()
 
     def remove_mem_range(self, base_addr: int, size: int, addr_type: MEM_ADDR_TYPE):
         r = MemoryRange(base_addr, size, addr_type)
@@ -160,14 +181,32 @@ class CacheController(RunnableComponent):
                 )
             )
             self._memory_ranges.remove(r)
+            self._update_range_index()
             return
         logger.error(
             self._create_message(f"MemoryRange addr:{base_addr} {addr_type.name} not found.")
         )
 
+    def _update_range_index(self):
+        self._sorted_ranges = sorted(self._memory_ranges, key=lambda r: r.base_addr)
+        self._range_starts = [r.base_addr for r in self._sorted_ranges]
+        # bisect only agrees with the first-added-wins scan when no two ranges overlap
+        self._ranges_overlap = any(
+            prev.base_addr == cur.base_addr or prev.base_addr + prev.size > cur.base_addr
+            for prev, cur in zip(self._sorted_ranges, self._sorted_ranges[1:])
+        )
+
     def _get_mem_range(self, addr: int) -> MemoryRange:
-        for range in self._memory_ranges:
-            if range.base_addr <= addr < (range.base_addr + range.size):
+        if self._ranges_overlap:
+            for range in self._memory_ranges:
+                if range.base_addr <= addr < range.base_addr + range.size:
+                    return range
+            logger.warning(self._create_message(f"0x{addr:x} is OOB"))
+            return None
+        i = bisect_right(self._range_starts, addr) - 1
+        if i >= 0:
+            range = self._sorted_ranges[i]
+            if addr < range.base_addr + range.size:
                 return range
         logger.warning(self._create_message(f"0x{addr:x} is OOB"))
         return None
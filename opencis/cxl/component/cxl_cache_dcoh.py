@@ -39,6 +39,7 @@ from opencis.cxl.transport.transaction import (
     CXL_CACHE_H2DRSP_CACHE_STATE,
     CXL_CACHE_D2HREQ_OPCODE,
     CXL_CACHE_D2HRSP_OPCODE,
+    CXL_CACHE_MSG_CLASS,
 )
 from opencis.cxl.transport.cache_fifo import (
     CacheFifoPair,
@@ -54,6 +55,9 @@ from opencis.cxl.component.cache_controller import (
 from opencis.pci.component.packet_processor import PacketProcessor
 from opencis.util.number import split_int
 
+# CQID is a 12-bit field
+CQID_COUNT = 4096
+
 
 @dataclass
 class CacheDcohCxlChannel:
@@ -93,13 +97,18 @@ class CxlCacheDcoh(PacketProcessor):
 
         # emulated .cache d2h channels
         self._cxl_channel = CacheDcohCxlChannel()
-
-        self.device_entries: dict[int, Future] = (
-            {}
-        )  # maps CQID -> received future packets associated with CQID
-        self.device_entry_lock = Lock()  # locks the above mapping
-
-        self._cqid_gen = cycle(range(0, 4096))
+        # h2d packets are distributed to the channels by their message class
+        self._h2d_channels = {
+            CXL_CACHE_MSG_CLASS.H2D_REQ: self._cxl_channel.h2d_req,
+            CXL_CACHE_MSG_CLASS.H2D_RSP: self._cxl_channel.h2d_rsp,
+            CXL_CACHE_MSG_CLASS.H2D_DATA: self._cxl_channel.h2d_data,
+        }
+
+        # indexed by CQID -> received future packets associated with CQID. Slots are only
+        # read and written between awaits, so no lock is needed
+        self.device_entries: list[Optional[Future]] = [None] * CQID_COUNT
+
+        self._cqid_gen = cycle(range(0, CQID_COUNT))
         self._cqid_assign_lock = Lock()
 
     async def get_next_cqid(self) -> int:
@@ -130,12 +139,10 @@ class CxlCacheDcoh(PacketProcessor):
 
         If the operation times out, the callback action unconditionally unregisters itself.
         """
-        async with self.device_entry_lock:
-            # two threads accessing self.device_entries simultaneously
-            # has the potential to SERIOUSLY break the emulator
-            if cqid in self.device_entries:
-                # cancel any currently running listeners, if they exist
-                self.device_entries[cqid].cancel()
+        device_entry = self.device_entries[cqid]
+        if device_entry is not None:
+            # cancel any currently running listeners, if they exist
+            device_entry.cancel()
 
         fut_pckt = BoundEvent()
 
@@ -148,15 +155,13 @@ class CxlCacheDcoh(PacketProcessor):
                     except TimeoutError:
                         # this request was apparently lost by the host
                         # clear the cqid entry for reuse
-                        async with self.device_entry_lock:
-                            del self.device_entries[cqid]
+                        self.device_entries[cqid] = None
                         current_task().cancel()  # intentionally cancel the current task
                 else:
                     await fut
                 cb(fut.result())
                 if _one_use:
-                    async with self.device_entry_lock:
-                        del self.device_entries[cqid]
+                    self.device_entries[cqid] = None
                     break
 
         self.device_entries[cqid] = fut_pckt
@@ -361,10 +366,11 @@ class CxlCacheDcoh(PacketProcessor):
 
         # TODO: implement cqid logic here
         # cqid = h2drsp_packet.h2drsp_header.cqid
-        # async with self.device_entry_lock:
-        #     if cqid in self.device_entries:
-        #         self.device_entries[cqid].set_result(h2drsp_packet)
-        #         return
+        # device_entry = self.device_entries[cqid]
+        # if device_entry is not None:
+        #     self.device_entries[cqid] = None
+        #     device_entry.set_result(h2drsp_packet)
+        #     return
 
         # Handle H2DRSP without matching CQID
 
@@ -397,10 +403,11 @@ class CxlCacheDcoh(PacketProcessor):
     #     TODO: migrate this to _process_cxl_h2d_rsp_packet
     #     cqid = h2ddata_packet.h2ddata_header.cqid
     #     print(f"getting cqid {cqid}")
-    #     async with self.device_entry_lock:
-    #         if cqid in self.device_entries:
-    #             print("Setting result")
-    #             self.device_entries[cqid].set_result(h2ddata_packet)
+    #     device_entry = self.device_entries[cqid]
+    #     if device_entry is not None:
+    #         print("Setting result")
+    #         self.device_entries[cqid] = None
+    #         device_entry.set_result(h2ddata_packet)
     #     # print("Back here")
     #     self._cur_state.state = COH_STATE_MACHINE.COH_STATE_INIT
 
@@ -439,8 +446,10 @@ class CxlCacheDcoh(PacketProcessor):
     async def _process_host_to_target(self):
         # pylint: disable=duplicate-code
         logger.debug(self._create_message("Started processing incoming fifo from host"))
+        get_packet = self._upstream_fifo.host_to_target.get
+        h2d_channels = self._h2d_channels
         while True:
-            packet = await self._upstream_fifo.host_to_target.get()
+            packet = await get_packet()
             if packet is None:
                 logger.debug(self._create_message("Stopped processing incoming fifo from host"))
                 break
@@ -450,14 +459,10 @@ class CxlCacheDcoh(PacketProcessor):
                 raise Exception(f"Received unexpected packet: {base_packet.get_type()}")
 
             cxl_packet = cast(CxlCacheBasePacket, packet)
-            if cxl_packet.is_h2dreq():
-                await self._cxl_channel.h2d_req.put(cast(CxlCacheH2DReqPacket, packet))
-            elif cxl_packet.is_h2drsp():
-                await self._cxl_channel.h2d_rsp.put(cast(CxlCacheH2DRspPacket, packet))
-            elif cxl_packet.is_h2ddata():
-                await self._cxl_channel.h2d_data.put(cast(CxlCacheH2DDataPacket, packet))
-            else:
+            channel = h2d_channels.get(cxl_packet.cxl_cache_header.msg_class)
+            if channel is None:
                 raise Exception(f"Received unexpected packet: {cxl_packet.get_type()}")
+            await channel.put(packet)
 
     # process from host/device channels simultaneously
     async def _cxl_cache_dcoh_main_loop(self):
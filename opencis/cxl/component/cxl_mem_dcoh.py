@@ -332,8 +332,9 @@ class CxlMemDcoh(PacketProcessor):
     # .mem m2s host packet handler
     # pylint: disable=duplicate-code
     async def _process_host_to_target(self):
+        get_packet = self._upstream_fifo.host_to_target.get
         while True:
-            packet = await self._upstream_fifo.host_to_target.get()
+            packet = await get_packet()
             if packet is None:
                 logger.debug(self._create_message("Stopped processing incoming fifo from host"))
                 break
@@ -7,7 +7,7 @@ See LICENSE for details.
 
 import asyncio
 from dataclasses import dataclass, field
-from typing import Callable, List
+from typing import Callable, List, Tuple
 
 from opencis.cxl.component.irq_manager import Irq, IrqManager
 from opencis.util.component import RunnableComponent
@@ -151,6 +151,9 @@ class CxlMemoryHub(RunnableComponent):
     def add_mem_range(self, addr: int, size: int, addr_type: MEM_ADDR_TYPE):
         self._cache_controller.add_mem_range(addr, size, addr_type)
 
+    def add_mem_ranges(self, ranges: List[Tuple[int, int, MEM_ADDR_TYPE]]):
+        self._cache_controller.add_mem_ranges(ranges)
+
     def remove_mem_range(self, addr: int, size: int, addr_type: MEM_ADDR_TYPE):
         self._cache_controller.remove_mem_range(addr, size, addr_type)
 
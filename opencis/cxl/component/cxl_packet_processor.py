@@ -5,6 +5,7 @@ This software is licensed under the terms of the Revised BSD License.
 See LICENSE for details.
 """
 
+import logging
 from asyncio import (
     StreamReader,
     StreamWriter,
@@ -181,6 +182,15 @@ class CxlPacketProcessor(RunnableComponent):
         sideband = cast(BaseSidebandPacket, packet)
         return sideband.sideband_header.type == SIDEBAND_TYPES.CONNECTION_DISCONNECTED
 
+    def _take_queued_frames(self, fifo: Queue, frames: List[bytes]) -> bool:
+        # Appends packets already waiting in the fifo, returns True on a disconnection
+        while not fifo.empty():
+            packet = fifo.get_nowait()
+            if self._is_disconnection_notification(packet):
+                return True
+            frames.append(bytes(packet))
+        return False
+
     def _push_tlp_table_entry(self, cxl_io_packet: CxlIoBasePacket):
         tid = cxl_io_packet.get_transaction_id()
         if tid in self._tlp_table:
@@ -204,17 +214,19 @@ class CxlPacketProcessor(RunnableComponent):
 
     async def _process_incoming_packets(self):
         logger.debug(self._create_message(f"Starting {self._incoming_dir} packet processor"))
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
         while True:  # pylint: disable=too-many-nested-blocks
             try:
                 packet = await self._reader.get_packet()
                 if packet.is_cxl_io():
                     cxl_io_packet = cast(CxlIoBasePacket, packet)
                     if cxl_io_packet.is_cpl() or cxl_io_packet.is_cpld():
-                        logger.debug(
-                            self._create_message(
-                                f"Received {self._incoming_dir} CXL.io (CPL/CPLD) packet"
+                        if debug_enabled:
+                            logger.debug(
+                                self._create_message(
+                                    f"Received {self._incoming_dir} CXL.io (CPL/CPLD) packet"
+                                )
                             )
-                        )
                         fifo_type = self._pop_tlp_table_entry(cxl_io_packet)
                         # Add MLD
                         if self._component_type == CXL_COMPONENT_TYPE.LD:
@@ -229,11 +241,12 @@ class CxlPacketProcessor(RunnableComponent):
                             else:
                                 await self._incoming.mmio.put(cxl_io_packet)
                     elif cxl_io_packet.is_cfg():
-                        logger.debug(
-                            self._create_message(
-                                f"Received {self._incoming_dir} CXL.io (CFG_RD/CFG_WR) packet"
+                        if debug_enabled:
+                            logger.debug(
+                                self._create_message(
+                                    f"Received {self._incoming_dir} CXL.io (CFG_RD/CFG_WR) packet"
+                                )
                             )
-                        )
                         self._push_tlp_table_entry(cxl_io_packet)
                         # Add MLD
                         if self._component_type == CXL_COMPONENT_TYPE.LD:
@@ -242,11 +255,12 @@ class CxlPacketProcessor(RunnableComponent):
                         else:
                             await self._incoming.cfg_space.put(cxl_io_packet)
                     elif cxl_io_packet.is_mmio():
-                        logger.debug(
-                            self._create_message(
-                                f"Received {self._incoming_dir} CXL.io (MRD/MWR) packet"
+                        if debug_enabled:
+                            logger.debug(
+                                self._create_message(
+                                    f"Received {self._incoming_dir} CXL.io (MRD/MWR) packet"
+                                )
                             )
-                        )
                         if cxl_io_packet.is_mem_write() is False:
                             self._push_tlp_table_entry(cxl_io_packet)
                         # Add MLD
@@ -266,9 +280,10 @@ class CxlPacketProcessor(RunnableComponent):
                     ):
                         logger.error(self._create_message("Got CXL.mem packet on no CXL.mem FIFO"))
                         continue
-                    logger.debug(
-                        self._create_message(f"Received {self._incoming_dir} CXL.mem packet")
-                    )
+                    if debug_enabled:
+                        logger.debug(
+                            self._create_message(f"Received {self._incoming_dir} CXL.mem packet")
+                        )
                     cxl_mem_packet = cast(CxlMemBasePacket, packet)
                     if self._component_type == CXL_COMPONENT_TYPE.LD:
                         # Add LD routing code
@@ -293,9 +308,10 @@ class CxlPacketProcessor(RunnableComponent):
                             self._create_message("Got CXL.cache packet on no CXL.cache FIFO")
                         )
                         continue
-                    logger.debug(
-                        self._create_message(f"Received {self._incoming_dir} CXL.cache packet")
-                    )
+                    if debug_enabled:
+                        logger.debug(
+                            self._create_message(f"Received {self._incoming_dir} CXL.cache packet")
+                        )
                     cxl_cache_packet = cast(CxlCacheBasePacket, packet)
                     await self._incoming.cxl_cache.put(cxl_cache_packet)
                 elif packet.is_cci():
@@ -341,6 +357,7 @@ class CxlPacketProcessor(RunnableComponent):
 
     async def _process_outgoing_cfg_packets(self):
         logger.debug(self._create_message("Starting outgoing CFG FIFO processor"))
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
         while True:
             packet = await self._outgoing.cfg_space.get()
             if self._is_disconnection_notification(packet):
@@ -348,16 +365,20 @@ class CxlPacketProcessor(RunnableComponent):
 
             cxl_io_packet = cast(CxlIoBasePacket, packet)
             if cxl_io_packet.is_cpl() or cxl_io_packet.is_cpld():
-                logger.debug(
-                    self._create_message(f"Received {self._outgoing_dir} CXL.io (CPL/CPLD) packet")
-                )
+                if debug_enabled:
+                    logger.debug(
+                        self._create_message(
+                            f"Received {self._outgoing_dir} CXL.io (CPL/CPLD) packet"
+                        )
+                    )
                 self._pop_tlp_table_entry(cxl_io_packet)
             else:
-                logger.debug(
-                    self._create_message(
-                        f"Received {self._outgoing_dir} CXL.io (CFG_RD/CFG_WR) packet"
+                if debug_enabled:
+                    logger.debug(
+                        self._create_message(
+                            f"Received {self._outgoing_dir} CXL.io (CFG_RD/CFG_WR) packet"
+                        )
                     )
-                )
                 self._push_tlp_table_entry(cxl_io_packet)
             self._writer.write(bytes(packet))
             await self._writer.drain()
@@ -365,20 +386,27 @@ class CxlPacketProcessor(RunnableComponent):
 
     async def _process_outgoing_mmio_packets(self):
         logger.debug(self._create_message("Starting outgoing MMIO FIFO processor"))
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
         while True:
             packet = await self._outgoing.mmio.get()
             if self._is_disconnection_notification(packet):
                 break
             cxl_io_packet = cast(CxlIoBasePacket, packet)
             if cxl_io_packet.is_cpl() or cxl_io_packet.is_cpld():
-                logger.debug(
-                    self._create_message(f"Received {self._outgoing_dir} CXL.io (CPL/CPLD) packet")
-                )
+                if debug_enabled:
+                    logger.debug(
+                        self._create_message(
+                            f"Received {self._outgoing_dir} CXL.io (CPL/CPLD) packet"
+                        )
+                    )
                 self._pop_tlp_table_entry(cxl_io_packet)
             else:
-                logger.debug(
-                    self._create_message(f"Received {self._outgoing_dir} CXL.io (MRD/MWR) packet")
-                )
+                if debug_enabled:
+                    logger.debug(
+                        self._create_message(
+                            f"Received {self._outgoing_dir} CXL.io (MRD/MWR) packet"
+                        )
+                    )
                 if cxl_io_packet.is_mem_write() is False:
                     self._push_tlp_table_entry(cxl_io_packet)
             self._writer.write(bytes(packet))
@@ -387,22 +415,32 @@ class CxlPacketProcessor(RunnableComponent):
 
     async def _process_outgoing_cxl_mem_packets(self):
         logger.debug(self._create_message("Starting outgoing CXL.mem FIFO processor"))
+        fifo = self._outgoing.cxl_mem
         while True:
-            packet = await self._outgoing.cxl_mem.get()
+            packet = await fifo.get()
             if self._is_disconnection_notification(packet):
                 break
-            self._writer.write(bytes(packet))
+            frames = [bytes(packet)]
+            disconnected = self._take_queued_frames(fifo, frames)
+            self._writer.writelines(frames)
             await self._writer.drain()
+            if disconnected:
+                break
         logger.debug(self._create_message("Stopped outgoing CXL.mem FIFO processor"))
 
     async def _process_outgoing_cxl_cache_packets(self):
         logger.debug(self._create_message("Starting outgoing CXL.cache FIFO processor"))
+        fifo = self._outgoing.cxl_cache
         while True:
-            packet = await self._outgoing.cxl_cache.get()
+            packet = await fifo.get()
             if self._is_disconnection_notification(packet):
                 break
-            self._writer.write(bytes(packet))
+            frames = [bytes(packet)]
+            disconnected = self._take_queued_frames(fifo, frames)
+            self._writer.writelines(frames)
             await self._writer.drain()
+            if disconnected:
+                break
         logger.debug(self._create_message("Stopped outgoing CXL.cache FIFO processor"))
 
     async def _process_outgoing_cci_packets(self):
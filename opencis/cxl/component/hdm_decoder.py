@@ -30,6 +30,10 @@ class HDM_DECODER_COUNT(IntEnum):
     DECODER_32 = 0xC
 
 
+# Number of decoders encoded by each HDM_DECODER_COUNT value
+HDM_DECODER_COUNT_NUM = {count: int(count.name.rsplit("_", 1)[1]) for count in HDM_DECODER_COUNT}
+
+
 class INTERLEAVE_GRANULARITY(IntEnum):
     SIZE_256B = 0x0
     SIZE_512B = 0x1
@@ -8,9 +8,8 @@ See LICENSE for details.
 from dataclasses import dataclass, field
 from asyncio import create_task, gather, sleep, Queue
 import asyncio
-from typing import cast
+import logging
 
-from opencis.cxl.transport.common import BasePacket
 from opencis.util.logger import logger
 from opencis.util.component import RunnableComponent
 from opencis.pci.component.fifo_pair import FifoPair
@@ -37,6 +36,8 @@ from opencis.cxl.transport.transaction import (
     CxlMemS2MNDRPacket,
     CxlMemS2MDRSPacket,
     CxlMemS2MBISnpPacket,
+    CxlMemCmpPacket,
+    CxlMemBISnpPacket,
     CXL_MEM_M2SREQ_OPCODE,
     CXL_MEM_M2SRWD_OPCODE,
     CXL_MEM_M2SBIRSP_OPCODE,
@@ -53,6 +54,9 @@ from opencis.cxl.component.cache_controller import (
     COH_STATE_MACHINE,
 )
 
+# Status-only responses carry no payload, so one shared instance per status is enough
+_CACHE_STATUS_RSP = {status: CacheResponse(status) for status in CACHE_RESPONSE_STATUS}
+
 
 @dataclass
 class HomeAgentCxlChannel:
@@ -93,27 +97,14 @@ class HomeAgent(RunnableComponent):
 
         # emulated .mem s2m channels
         self._cxl_channel = HomeAgentCxlChannel()
-
-    def _create_m2s_req_packet(
-        self,
-        opcode: CXL_MEM_M2SREQ_OPCODE,
-        meta_field: CXL_MEM_META_FIELD,
-        meta_value: CXL_MEM_META_VALUE,
-        snp_type: CXL_MEM_M2S_SNP_TYPE,
-        addr: int,
-    ) -> CxlMemMemRdPacket:
-        return CxlMemMemRdPacket.create(addr, opcode, meta_field, meta_value, snp_type)
-
-    def _create_m2s_rwd_packet(
-        self,
-        opcode: CXL_MEM_M2SRWD_OPCODE,
-        meta_field: CXL_MEM_META_FIELD,
-        meta_value: CXL_MEM_META_VALUE,
-        snp_type: CXL_MEM_M2S_SNP_TYPE,
-        addr: int,
-        data: int,
-    ) -> CxlMemMemWrPacket:
-        return CxlMemMemWrPacket.create(addr, data, opcode, meta_field, meta_value, snp_type)
+        self._s2m_channel_by_type = {
+            CxlMemS2MNDRPacket: self._cxl_channel.s2m_ndr,
+            CxlMemCmpPacket: self._cxl_channel.s2m_ndr,
+            CxlMemS2MDRSPacket: self._cxl_channel.s2m_drs,
+            CxlMemMemDataPacket: self._cxl_channel.s2m_drs,
+            CxlMemS2MBISnpPacket: self._cxl_channel.s2m_bisnp,
+            CxlMemBISnpPacket: self._cxl_channel.s2m_bisnp,
+        }
 
     async def _write_memory(self, addr: int, size: int, value: int):
         packet = MemoryRequest(MEMORY_REQUEST_TYPE.WRITE, addr, size, value)
@@ -133,53 +124,66 @@ class HomeAgent(RunnableComponent):
         if addr % 64 != 0 or size % 64 != 0:
             raise Exception("Size and address must be aligned to 64!")
 
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
+        loop = asyncio.get_running_loop()
         chunk_count = 0
-        while size > 0:
-            message = self._create_message(f"CXL.mem: Writing 0x{value:08x} to 0x{addr:08x}")
-            logger.debug(message)
-            low_64_byte = value & ((1 << (64 * 8)) - 1)
-            packet = CxlMemMemWrPacket.create(addr + (chunk_count * 64), low_64_byte)
-            await self._downstream_cxl_mem_fifos.host_to_target.put(packet)
-            try:
-                async with asyncio.timeout(3):
+        try:
+            # one timeout context for the transfer, re-armed so each chunk has 3 seconds
+            async with asyncio.timeout(None) as deadline:
+                while size > 0:
+                    chunk_addr = addr + (chunk_count * 64)
+                    low_64_byte = value & ((1 << (64 * 8)) - 1)
+                    if debug_enabled:
+                        logger.debug(
+                            self._create_message(
+                                f"CXL.mem: Writing 0x{low_64_byte:08x} to 0x{chunk_addr:08x}"
+                            )
+                        )
+                    packet = CxlMemMemWrPacket.create(chunk_addr, low_64_byte)
+                    await self._downstream_cxl_mem_fifos.host_to_target.put(packet)
+                    deadline.reschedule(loop.time() + 3)
                     packet = await self._downstream_cxl_mem_fifos.target_to_host.get()
-            except asyncio.exceptions.TimeoutError:
-                logger.error(self._create_message("CXL.mem Write: Timed-out"))
-                return
-            size -= 64
-            chunk_count += 1
-            value >>= 64 * 8
+                    size -= 64
+                    chunk_count += 1
+                    value >>= 64 * 8
+        except asyncio.exceptions.TimeoutError:
+            logger.error(self._create_message("CXL.mem Write: Timed-out"))
 
     async def read_cxl_mem(self, addr: int, size: int) -> int:
         if addr % 64 or size % 64:
             raise Exception("Size and address must be aligned to 64!")
 
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
+        loop = asyncio.get_running_loop()
         result = 0
-        while size > 0:
-            message = self._create_message(f"CXL.mem: Reading data from 0x{addr:08x}")
-            logger.debug(message)
-            packet = CxlMemMemRdPacket.create(addr + (size - 64))
-            await self._downstream_cxl_mem_fifos.host_to_target.put(packet)
-
-            try:
-                # Does not work since target_to_host queue conflicts with
-                # _process_downstream_target_to_host_packets
-                async with asyncio.timeout(3):
+        try:
+            # one timeout context for the transfer, re-armed so each chunk has 3 seconds
+            async with asyncio.timeout(None) as deadline:
+                while size > 0:
+                    chunk_addr = addr + (size - 64)
+                    if debug_enabled:
+                        logger.debug(
+                            self._create_message(f"CXL.mem: Reading data from 0x{chunk_addr:08x}")
+                        )
+                    packet = CxlMemMemRdPacket.create(chunk_addr)
+                    await self._downstream_cxl_mem_fifos.host_to_target.put(packet)
+                    deadline.reschedule(loop.time() + 3)
                     packet = await self._downstream_cxl_mem_fifos.target_to_host.get()
-                assert is_cxl_mem_data(packet)
-                mem_data_packet = cast(CxlMemMemDataPacket, packet)
-                size -= 64
-                result |= mem_data_packet.data
-                result <<= 64 * 8
-            except asyncio.exceptions.TimeoutError:
-                logger.error(self._create_message("CXL.mem Read: Timed-out"))
-                return None
+                    assert is_cxl_mem_data(packet)
+                    size -= 64
+                    result |= packet.data
+                    result <<= 64 * 8
+        except asyncio.exceptions.TimeoutError:
+            logger.error(self._create_message("CXL.mem Read: Timed-out"))
+            return None
 
         return result
 
     async def _process_memory_io_bridge_requests(self):
+        request_fifo = self._memory_consumer_io_fifos.request
+        response_fifo = self._memory_consumer_io_fifos.response
         while True:
-            packet = await self._memory_consumer_io_fifos.request.get()
+            packet = await request_fifo.get()
             if packet is None:
                 logger.debug(
                     self._create_message("Stopped processing memory access requests from IO Bridge")
@@ -190,11 +194,13 @@ class HomeAgent(RunnableComponent):
             elif packet.type == MEMORY_REQUEST_TYPE.READ:
                 data = await self._read_memory(packet.addr, packet.size)
                 response = MemoryResponse(MEMORY_RESPONSE_STATUS.OK, data)
-                await self._memory_consumer_io_fifos.response.put(response)
+                await response_fifo.put(response)
 
     async def _process_memory_coh_bridge_requests(self):
+        request_fifo = self._memory_consumer_coh_fifos.request
+        response_fifo = self._memory_consumer_coh_fifos.response
         while True:
-            packet = await self._memory_consumer_coh_fifos.request.get()
+            packet = await request_fifo.get()
             if packet is None:
                 logger.debug(
                     self._create_message(
@@ -207,10 +213,11 @@ class HomeAgent(RunnableComponent):
             elif packet.type == MEMORY_REQUEST_TYPE.READ:
                 data = await self._read_memory(packet.addr, packet.size)
                 response = MemoryResponse(MEMORY_RESPONSE_STATUS.OK, data)
-                await self._memory_consumer_coh_fifos.response.put(response)
+                await response_fifo.put(response)
 
     # .mem s2m rsp handler
     async def _process_cxl_s2m_rsp_packet(self, s2mndr_packet: CxlMemS2MNDRPacket):
+        cur_state = self._cur_state
         if s2mndr_packet.s2mndr_header.opcode == CXL_MEM_S2MNDR_OPCODE.CMP_S:
             status = CACHE_RESPONSE_STATUS.RSP_S
         elif s2mndr_packet.s2mndr_header.opcode == CXL_MEM_S2MNDR_OPCODE.CMP_E:
@@ -218,13 +225,13 @@ class HomeAgent(RunnableComponent):
         elif s2mndr_packet.s2mndr_header.opcode == CXL_MEM_S2MNDR_OPCODE.CMP_M:
             pass
         else:
-            if self._cur_state.birsp_sched:
-                bi_id = self._cur_state.packet.s2mbisnp_header.bi_id
-                bi_tag = self._cur_state.packet.s2mbisnp_header.bi_tag
-                cxl_packet = CxlMemBIRspPacket.create(self._cur_state.cache_rsp, bi_id, bi_tag)
+            if cur_state.birsp_sched:
+                bi_id = cur_state.packet.s2mbisnp_header.bi_id
+                bi_tag = cur_state.packet.s2mbisnp_header.bi_tag
+                cxl_packet = CxlMemBIRspPacket.create(cur_state.cache_rsp, bi_id, bi_tag)
                 await self._downstream_cxl_mem_fifos.host_to_target.put(cxl_packet)
-                self._cur_state.birsp_sched = False
-            self._cur_state.state = COH_STATE_MACHINE.COH_STATE_INIT
+                cur_state.birsp_sched = False
+            cur_state.state = COH_STATE_MACHINE.COH_STATE_INIT
             return
 
         if s2mndr_packet.s2mndr_header.meta_value == CXL_MEM_META_VALUE.ANY:
@@ -232,28 +239,30 @@ class HomeAgent(RunnableComponent):
             while self._cxl_channel.s2m_drs.empty():
                 await asyncio.sleep(0)  # just spin
             cxl_packet = await self._cxl_channel.s2m_drs.get()
-            assert cast(CxlMemBasePacket, cxl_packet).is_s2mdrs()
+            assert cxl_packet.is_s2mdrs()
             cache_packet = CacheResponse(status, cxl_packet.data)
         else:
-            cache_packet = CacheResponse(status)
+            cache_packet = _CACHE_STATUS_RSP[status]
         await self._upstream_cache_to_home_agent_fifos.response.put(cache_packet)
-        self._cur_state.state = COH_STATE_MACHINE.COH_STATE_INIT
+        cur_state.state = COH_STATE_MACHINE.COH_STATE_INIT
 
     # .mem s2m drs handler
     # method is only used for non cacheable devices like memory expander
-    async def _process_cxl_s2m_drs_packet(self, s2mdrs_packet: CxlMemS2MDRSPacket):
+    # has no await points, so it is called inline instead of as a coroutine
+    def _process_cxl_s2m_drs_packet(self, s2mdrs_packet: CxlMemS2MDRSPacket):
         assert s2mdrs_packet.s2mdrs_header.opcode == CXL_MEM_S2MDRS_OPCODE.MEM_DATA
 
         cache_packet = CacheResponse(CACHE_RESPONSE_STATUS.OK, s2mdrs_packet.data)
-        await self._upstream_cache_to_home_agent_fifos.response.put(cache_packet)
+        self._upstream_cache_to_home_agent_fifos.response.put_nowait(cache_packet)
         self._cur_state.state = COH_STATE_MACHINE.COH_STATE_INIT
 
     # .mem s2m bisnp handler
     async def _process_cxl_s2m_bisnp_packet(self, s2mbisnp_packet: CxlMemS2MBISnpPacket):
-        if self._cur_state.state == COH_STATE_MACHINE.COH_STATE_WAIT:
+        cur_state = self._cur_state
+        if cur_state.state == COH_STATE_MACHINE.COH_STATE_WAIT:
             return
 
-        if self._cur_state.state == COH_STATE_MACHINE.COH_STATE_START:
+        if cur_state.state == COH_STATE_MACHINE.COH_STATE_START:
             addr = s2mbisnp_packet.get_address()
 
             if s2mbisnp_packet.s2mbisnp_header.opcode == CXL_MEM_S2MBISNP_OPCODE.BISNP_DATA:
@@ -271,30 +280,31 @@ class HomeAgent(RunnableComponent):
                 # the cacheline w/ same address is currently write back to device
                 rsp_state = CXL_MEM_M2SBIRSP_OPCODE.BIRSP_I
                 cxl_packet = CxlMemBIRspPacket.create(rsp_state, bi_id, bi_tag)
-                self._cur_state.state = COH_STATE_MACHINE.COH_STATE_INIT
+                cur_state.state = COH_STATE_MACHINE.COH_STATE_INIT
             else:
                 if packet.status == CACHE_RESPONSE_STATUS.RSP_S:
-                    self._cur_state.cache_rsp = CXL_MEM_M2SBIRSP_OPCODE.BIRSP_S
+                    cur_state.cache_rsp = CXL_MEM_M2SBIRSP_OPCODE.BIRSP_S
                 else:
-                    self._cur_state.cache_rsp = CXL_MEM_M2SBIRSP_OPCODE.BIRSP_I
-                self._cur_state.birsp_sched = True
+                    cur_state.cache_rsp = CXL_MEM_M2SBIRSP_OPCODE.BIRSP_I
+                cur_state.birsp_sched = True
                 opcode = CXL_MEM_M2SRWD_OPCODE.MEM_WR
                 meta_field = CXL_MEM_META_FIELD.META0_STATE
                 meta_value = CXL_MEM_META_VALUE.INVALID
                 snp_type = CXL_MEM_M2S_SNP_TYPE.NO_OP
 
-                cxl_packet = self._create_m2s_rwd_packet(
-                    opcode, meta_field, meta_value, snp_type, addr, packet.data
+                cxl_packet = CxlMemMemWrPacket.create(
+                    addr, packet.data, opcode, meta_field, meta_value, snp_type
                 )
-                self._cur_state.state = COH_STATE_MACHINE.COH_STATE_WAIT
+                cur_state.state = COH_STATE_MACHINE.COH_STATE_WAIT
             await self._downstream_cxl_mem_fifos.host_to_target.put(cxl_packet)
 
     # .mem m2s packet process
     async def _process_upstream_host_to_target_packets(self, cache_packet: CacheRequest):
-        if self._cur_state.state == COH_STATE_MACHINE.COH_STATE_WAIT:
+        cur_state = self._cur_state
+        if cur_state.state == COH_STATE_MACHINE.COH_STATE_WAIT:
             return
 
-        if self._cur_state.state == COH_STATE_MACHINE.COH_STATE_START:
+        if cur_state.state == COH_STATE_MACHINE.COH_STATE_START:
             meta_field = CXL_MEM_META_FIELD.NO_OP
             meta_value = CXL_MEM_META_VALUE.INVALID
             snp_type = CXL_MEM_M2S_SNP_TYPE.NO_OP
@@ -325,10 +335,10 @@ class HomeAgent(RunnableComponent):
                 elif cache_packet.type == CACHE_REQUEST_TYPE.UNCACHED_WRITE:
                     meta_value = CXL_MEM_META_VALUE.ANY
 
-                cxl_packet = self._create_m2s_rwd_packet(
-                    opcode, meta_field, meta_value, snp_type, addr, data
+                cxl_packet = CxlMemMemWrPacket.create(
+                    addr, data, opcode, meta_field, meta_value, snp_type
                 )
-                packet = CacheResponse(CACHE_RESPONSE_STATUS.OK)
+                packet = _CACHE_STATUS_RSP[CACHE_RESPONSE_STATUS.OK]
                 await self._upstream_cache_to_home_agent_fifos.response.put(packet)
             else:
                 # HDM-H Normal Read
@@ -358,73 +368,90 @@ class HomeAgent(RunnableComponent):
                 else:
                     raise Exception(f"Invalid M2S Opcode Type: {cache_packet.type}")
 
-                cxl_packet = self._create_m2s_req_packet(
-                    opcode, meta_field, meta_value, snp_type, addr
+                cxl_packet = CxlMemMemRdPacket.create(
+                    addr, opcode, meta_field, meta_value, snp_type
                 )
 
-            self._cur_state.state = COH_STATE_MACHINE.COH_STATE_WAIT
+            cur_state.state = COH_STATE_MACHINE.COH_STATE_WAIT
             await self._downstream_cxl_mem_fifos.host_to_target.put(cxl_packet)
 
+    def _get_s2m_channel(self, packet: CxlMemBasePacket) -> Queue:
+        channel = self._s2m_channel_by_type.get(type(packet))
+        if channel is not None:
+            return channel
+
+        if not packet.is_cxl_mem():
+            raise Exception(f"Received unexpected packet: {packet.get_type()}")
+        if packet.is_s2mndr():
+            return self._cxl_channel.s2m_ndr
+        if packet.is_s2mdrs():
+            return self._cxl_channel.s2m_drs
+        if packet.is_s2mbisnp():
+            return self._cxl_channel.s2m_bisnp
+        raise Exception(f"Received unexpected packet: {packet.get_type()}")
+
     # .mem s2m packet process
     async def _process_downstream_target_to_host_packets(self):
+        target_to_host = self._downstream_cxl_mem_fifos.target_to_host
+        get_s2m_channel = self._get_s2m_channel
         while True:
-            packet = await self._downstream_cxl_mem_fifos.target_to_host.get()
-            if packet is None:
-                logger.debug(
-                    self._create_message(
-                        "Stopped processing memory access requests from downstream packets"
+            packet = await target_to_host.get()
+            # drain every packet already queued before waiting again
+            while True:
+                if packet is None:
+                    logger.debug(
+                        self._create_message(
+                            "Stopped processing memory access requests from downstream packets"
+                        )
                     )
-                )
-                break
+                    return
 
-            base_packet = cast(BasePacket, packet)
-            if not base_packet.is_cxl_mem():
-                raise Exception(f"Received unexpected packet: {base_packet.get_type()}")
-
-            # packets are distributed to s2m channels
-            cxl_packet = cast(CxlMemBasePacket, packet)
-            if cxl_packet.is_s2mndr():
-                await self._cxl_channel.s2m_ndr.put(cast(CxlMemS2MNDRPacket, packet))
-            elif cxl_packet.is_s2mdrs():
-                await self._cxl_channel.s2m_drs.put(cast(CxlMemS2MDRSPacket, packet))
-            elif cxl_packet.is_s2mbisnp():
-                await self._cxl_channel.s2m_bisnp.put(cast(CxlMemS2MBISnpPacket, packet))
-            else:
-                raise Exception(f"Received unexpected packet: {cxl_packet.get_type()}")
+                # packets are distributed to s2m channels
+                get_s2m_channel(packet).put_nowait(packet)
+                if target_to_host.empty():
+                    break
+                packet = target_to_host.get_nowait()
 
     # process from host/device channels one by one in state machine
+    # host requests and device BISnps stay serialized: the Cmp NDR completing a host write-back
+    # and the one completing a BISnp-triggered write carry no tag to tell them apart
     async def _home_agent_coherency_main_loop(self):
+        cur_state = self._cur_state
         _stop_process = False
         _fc_run = False
         _fc_host_run = False
 
+        # FIFO references never change, so resolve them once outside the loop
+        host_request_fifo = self._upstream_cache_to_home_agent_fifos.request
+        s2m_ndr_fifo = self._cxl_channel.s2m_ndr
+        s2m_drs_fifo = self._cxl_channel.s2m_drs
+        s2m_bisnp_fifo = self._cxl_channel.s2m_bisnp
+
         while not _stop_process:
             await sleep(0)
             # flow control for host/device packets
             # link state machine and function to the current request
-            if self._cur_state.state == COH_STATE_MACHINE.COH_STATE_INIT:
+            if cur_state.state == COH_STATE_MACHINE.COH_STATE_INIT:
                 _fc_run = False
                 if _fc_host_run is False:
-                    if not self._upstream_cache_to_home_agent_fifos.request.empty():
+                    if not host_request_fifo.empty():
                         _fc_run = True
                         _fc_host_run = True
-                    elif not self._cxl_channel.s2m_bisnp.empty():
+                    elif not s2m_bisnp_fifo.empty():
                         _fc_run = True
                         _fc_host_run = False
                 else:
-                    if not self._cxl_channel.s2m_bisnp.empty():
+                    if not s2m_bisnp_fifo.empty():
                         _fc_run = True
                         _fc_host_run = False
-                    elif not self._upstream_cache_to_home_agent_fifos.request.empty():
+                    elif not host_request_fifo.empty():
                         _fc_run = True
                         _fc_host_run = True
 
                 if _fc_run:
                     if _fc_host_run:
-                        self._cur_state.packet = (
-                            await self._upstream_cache_to_home_agent_fifos.request.get()
-                        )
-                        if self._cur_state.packet is None:
+                        cur_state.packet = await host_request_fifo.get()
+                        if cur_state.packet is None:
                             logger.debug(
                                 self._create_message(
                                     "Stop processing home agent coherency main loop"
@@ -433,23 +460,22 @@ class HomeAgent(RunnableComponent):
                             _stop_process = True
                         fn = self._process_upstream_host_to_target_packets
                     else:
-                        self._cur_state.packet = await self._cxl_channel.s2m_bisnp.get()
+                        cur_state.packet = await s2m_bisnp_fifo.get()
                         fn = self._process_cxl_s2m_bisnp_packet
 
-                    self._cur_state.state = COH_STATE_MACHINE.COH_STATE_START
+                    cur_state.state = COH_STATE_MACHINE.COH_STATE_START
 
             # run request processing and response checking code continuously until state changed
             # drs packets are extracted and consumed in ndr processing code
             else:
-                await fn(self._cur_state.packet)
+                await fn(cur_state.packet)
 
-                if not self._cxl_channel.s2m_ndr.empty():
-                    packet = await self._cxl_channel.s2m_ndr.get()
+                if not s2m_ndr_fifo.empty():
+                    packet = await s2m_ndr_fifo.get()
                     await self._process_cxl_s2m_rsp_packet(packet)
 
-                if not self._cxl_channel.s2m_drs.empty():
-                    packet = await self._cxl_channel.s2m_drs.get()
-                    await self._process_cxl_s2m_drs_packet(packet)
+                if not s2m_drs_fifo.empty():
+                    self._process_cxl_s2m_drs_packet(s2m_drs_fifo.get_nowait())
 
     async def _run(self):
         tasks = [
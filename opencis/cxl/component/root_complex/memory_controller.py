@@ -7,6 +7,7 @@ See LICENSE for details.
 
 from dataclasses import dataclass
 from asyncio import create_task, gather
+from itertools import groupby
 from opencis.util.component import RunnableComponent
 from opencis.cxl.transport.memory_fifo import (
     MemoryFifoPair,
@@ -17,6 +18,13 @@ from opencis.cxl.transport.memory_fifo import (
 from opencis.util.logger import logger
 from opencis.util.accessor import FileAccessor
 
+# Write completions and failures carry no payload, so single shared instances are reused
+_MEM_RSP_OK = MemoryResponse(MEMORY_RESPONSE_STATUS.OK)
+_MEM_RSP_FAILED = MemoryResponse(MEMORY_RESPONSE_STATUS.FAILED)
+
+# Upper bound on queued requests served together with one open of the backing file
+MEMORY_REQUEST_BATCH_SIZE = 16
+
 
 @dataclass
 class MemoryControllerConfig:
@@ -36,22 +44,48 @@ class MemoryController(RunnableComponent):
     def get_mem_size(self) -> int:
         return self._memory_size
 
+    async def _access_memory(self, request_type: MEMORY_REQUEST_TYPE, group: list):
+        if request_type == MEMORY_REQUEST_TYPE.WRITE:
+            await self._file_accessor.writev(
+                [(packet.addr, packet.data, packet.size) for packet in group]
+            )
+            return [_MEM_RSP_OK] * len(group)
+        if request_type == MEMORY_REQUEST_TYPE.READ:
+            data_list = await self._file_accessor.readv(
+                [(packet.addr, packet.size) for packet in group]
+            )
+            return [MemoryResponse(MEMORY_RESPONSE_STATUS.OK, data) for data in data_list]
+        logger.warning(self._create_message(f"Unsupported memory request type {request_type.name}"))
+        return [_MEM_RSP_FAILED] * len(group)
+
     async def _process_memory_requests(self):
+        request_fifo = self._memory_consumer_fifos.request
+        response_fifo = self._memory_consumer_fifos.response
         while True:
-            packet = await self._memory_consumer_fifos.request.get()
-            if packet is None:
+            packets = [await request_fifo.get()]
+            # pick up whatever else is already queued so it can share file accesses
+            while len(packets) < MEMORY_REQUEST_BATCH_SIZE and not request_fifo.empty():
+                packets.append(request_fifo.get_nowait())
+
+            stopped = None in packets
+            if stopped:
+                packets = packets[: packets.index(None)]
+
+            for request_type, group in groupby(packets, key=lambda packet: packet.type):
+                group = list(group)
+                try:
+                    responses = await self._access_memory(request_type, group)
+                except OSError as e:
+                    logger.error(self._create_message(f"{request_type.name} access failed: {e}"))
+                    responses = [_MEM_RSP_FAILED] * len(group)
+                # every request is answered, so no requester is left waiting on the response
+                for response in responses:
+                    response_fifo.put_nowait(response)
+
+            if stopped:
                 logger.debug(self._create_message("Stopped processing memory access requests"))
                 break
 
-            addr = packet.addr
-            if packet.type == MEMORY_REQUEST_TYPE.WRITE:
-                await self._file_accessor.write(addr, packet.data, packet.size)
-                response = MemoryResponse(MEMORY_RESPONSE_STATUS.OK)
-            elif packet.type == MEMORY_REQUEST_TYPE.READ:
-                data = await self._file_accessor.read(addr, packet.size)
-                response = MemoryResponse(MEMORY_RESPONSE_STATUS.OK, data)
-            await self._memory_consumer_fifos.response.put(response)
-
     async def _run(self):
         tasks = [create_task(self._process_memory_requests())]
         await self._change_status_to_running()
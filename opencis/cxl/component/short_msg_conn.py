@@ -5,6 +5,8 @@ This software is licensed under the terms of the Revised BSD License.
 See LICENSE for details.
 """
 
+import logging
+import socket
 from asyncio import (
     Event,
     StreamReader,
@@ -17,12 +19,24 @@ from asyncio import (
 )
 from asyncio.exceptions import CancelledError
 from enum import Enum
+from functools import partial
+from struct import Struct
 from typing import Callable
 
 from opencis.util.component import RunnableComponent
 from opencis.util.logger import logger
 from opencis.util.server import ServerComponent
 
+# Maximum number of messages pulled from the stream per read
+SHORT_MSG_READ_COUNT = 64
+
+# Unsent bytes on a connection above which the transport pauses writing, so the transmit
+# task's drain waits for the socket to catch up
+SHORT_MSG_DRAIN_THRESHOLD = 16 * 1024
+
+# struct codes for message widths that map onto a native unsigned integer
+_SHORT_MSG_STRUCT_CODES = {1: "B", 2: "H", 4: "I", 8: "Q"}
+
 
 class ShortMsgBase(Enum):
     @property
@@ -30,8 +44,35 @@ class ShortMsgBase(Enum):
         return self.value
 
 
+class _ShortMsgDispatchTable(dict):
+    # (dev_id, msg) pairs without a device handler resolve to the invalid dispatch when the
+    # device registered handlers of its own, and to the general handler dispatch otherwise
+    def __init__(self, general_dispatch: Callable, invalid_dispatch: Callable):
+        super().__init__()
+        self._general_dispatch = general_dispatch
+        self._invalid_dispatch = invalid_dispatch
+        self._handler_dev_ids: set[int] = set()
+
+    def register(self, dev_id: int, msg: ShortMsgBase, func: Callable):
+        if dev_id not in self._handler_dev_ids:
+            self._handler_dev_ids.add(dev_id)
+            # entries resolved before the device had handlers pointed at the general dispatch
+            for key in [key for key in self if key[0] == dev_id]:
+                del self[key]
+        self[(dev_id, msg)] = func
+
+    def __missing__(self, key: tuple[int, ShortMsgBase]) -> Callable:
+        dev_id, msg = key
+        if dev_id in self._handler_dev_ids:
+            func = partial(self._invalid_dispatch, msg)
+        else:
+            func = partial(self._general_dispatch, msg)
+        self[key] = func
+        return func
+
+
 class ShortMsgConn(RunnableComponent):
-    _msg_to_interrupt_event: dict[int, dict[ShortMsgBase, Callable]]
+    _dispatch: _ShortMsgDispatchTable
     _callbacks: list[Callable]
     _server_component: Task
 
@@ -49,8 +90,12 @@ class ShortMsgConn(RunnableComponent):
         self._addr = addr
         self._port = port
         self._msg_width = msg_width + 1  # 1 extra byte for sending device ID
+        # message number followed by device ID, big-endian; wider messages use int.from_bytes
+        self._parser = None
+        if msg_width in _SHORT_MSG_STRUCT_CODES:
+            self._parser = Struct(f">{_SHORT_MSG_STRUCT_CODES[msg_width]}B")
         self._callbacks = []
-        self._msg_to_interrupt_event = {}
+        self._dispatch = _ShortMsgDispatchTable(self._dispatch_general, self._dispatch_invalid)
         self._general_interrupt_event = {}
         self._server = server
         if server:
@@ -62,7 +107,10 @@ class ShortMsgConn(RunnableComponent):
             )
         else:
             self._server_component = None
+        # connections and their transmit state are keyed by the device number
         self._connections: dict[int, tuple[StreamReader, StreamWriter]] = {}
+        self._tx_bufs: dict[int, bytearray] = {}
+        self._tx_events: dict[int, Event] = {}
         self._tasks: list[Task] = []
         self._msg_handlers: list[Task] = []
         self._lock = Lock()
@@ -71,8 +119,14 @@ class ShortMsgConn(RunnableComponent):
         self._writer_id = {}
         self._device_id = device_id
         self._run_status = False
-        self._msg_tasks: list[Task] = []
+        self._msg_tasks: set[Task] = set()
         self._msg_type = msg_type
+        # values outside this table go through the enum so _missing_ hooks still apply
+        self._msg_type_lut = {msg.value: msg for msg in msg_type}
+        # encoded messages keyed by real_val; values outside the enum are added on first send
+        self._wire_cache: dict[int, bytes] = {}
+        for msg in msg_type:
+            self._encode_msg(msg)
 
     def get_port(self):
         return self._port
@@ -90,18 +144,12 @@ class ShortMsgConn(RunnableComponent):
             dev_id = 0
             device_name = "host"
 
-        async def _callback(dev_id):
-            await msg_recv_cb(dev_id)
-
-        cb_func = _callback
         logger.debug(
             self._create_message(
                 f"Registering callback for ShortMsg {short_msg.name} for remote {device_name}"
             )
         )
-        if dev_id not in self._msg_to_interrupt_event:
-            self._msg_to_interrupt_event[dev_id] = {}
-        self._msg_to_interrupt_event[dev_id][short_msg] = cb_func
+        self._dispatch.register(dev_id, short_msg, msg_recv_cb)
 
     def register_general_handler(
         self, short_msg: ShortMsgBase, msg_recv_cb: Callable, persistent: bool = True
@@ -111,61 +159,74 @@ class ShortMsgConn(RunnableComponent):
         Handlers registered here will be triggered disregard of the device.
         """
 
-        async def _callback(dev_id, data):
-            await msg_recv_cb(dev_id, data)
-
-        cb_func = _callback
         logger.debug(
             self._create_message(f"Registering a general interrupt for ShortMsg {short_msg.name}")
         )
-        self._general_interrupt_event[short_msg] = (cb_func, persistent)
+        self._general_interrupt_event[short_msg] = (msg_recv_cb, persistent)
+
+    def _dispatch_general(self, msg: ShortMsgBase, remote_dev_id: int):
+        general_handler = self._general_interrupt_event.get(msg)
+        if general_handler is None:
+            remote_dev_name = f"device: {remote_dev_id}" if self._server else "host"
+            raise RuntimeError(f"ShortMsg: {msg} is not registered for remote {remote_dev_name}")
+        func, persistent = general_handler
+        if not persistent:
+            del self._general_interrupt_event[msg]
+        return func(remote_dev_id, msg)
+
+    def _dispatch_invalid(self, msg: ShortMsgBase, remote_dev_id: int):
+        remote_dev_name = f"device: {remote_dev_id}" if self._server else "host"
+        raise RuntimeError(f"Invalid ShortMsg: {msg} for remote {remote_dev_name}")
+
+    def _dispatch_msg(self, msg_num: int, remote_dev_id: int):
+        if not self._server:
+            remote_dev_id = 0
+
+        msg = self._msg_type_lut.get(msg_num)
+        if msg is None:
+            msg = self._msg_type(msg_num)
+        t = create_task(self._dispatch[(remote_dev_id, msg)](remote_dev_id))
+        self._msg_tasks.add(t)
+        t.add_done_callback(self._msg_tasks.discard)
+        if logger.isEnabledFor(logging.DEBUG):
+            remote_dev_name = f"device: {remote_dev_id}" if self._server else "host"
+            logger.debug(
+                self._create_message(
+                    f"ShortMsg handled for {msg.name} from remote {remote_dev_name}"
+                )
+            )
 
     async def _msg_handler(self, reader: StreamReader, _: StreamWriter):
         this_dev_name = f"Device {self._device_id}"
         if self._server:
             this_dev_name = "Host"
         logger.debug(self._create_message(f"{this_dev_name}: Creating ShortMsg handler"))
+        # Messages are fixed-width, so read whatever has arrived into one receive buffer
+        # and parse the messages in place instead of waiting on the stream per message
+        width = self._msg_width
+        parser = self._parser
+        dispatch_msg = self._dispatch_msg
+        buf = bytearray()
         while True:
             if not self._run_status:
                 logger.debug(self._create_message(f"{this_dev_name} _msg_handler exiting"))
                 return
 
-            msg = await reader.readexactly(self._msg_width)
-            if not msg:
+            data = await reader.read(SHORT_MSG_READ_COUNT * width)
+            if not data:
                 logger.debug(self._create_message(f"{this_dev_name} ShortMsg connection broken"))
                 return
-            msg_int = int.from_bytes(msg)
-            remote_dev_id = msg_int & 0xFF
-            remote_dev_name = f"device: {remote_dev_id}"
-            if not self._server:
-                remote_dev_id = 0
-                remote_dev_name = "host"
-
-            msg_num = msg_int >> 8
-            msg = self._msg_type(msg_num)
-            if remote_dev_id not in self._msg_to_interrupt_event:
-                if msg not in self._general_interrupt_event:
-                    raise RuntimeError(
-                        f"ShortMsg: {msg} is not registered for remote {remote_dev_name}"
-                    )
-                func = self._general_interrupt_event[msg][0]
-                persistent = self._general_interrupt_event[msg][1]
-                if not persistent:
-                    del self._general_interrupt_event[msg]
-                t = create_task(func(remote_dev_id, msg))
-                self._msg_tasks.append(t)
-                continue
-
-            if msg not in self._msg_to_interrupt_event[remote_dev_id]:
-                raise RuntimeError(f"Invalid ShortMsg: {msg} for remote {remote_dev_name}")
-
-            t = create_task(self._msg_to_interrupt_event[remote_dev_id][msg](remote_dev_id))
-            self._msg_tasks.append(t)
-            logger.debug(
-                self._create_message(
-                    f"ShortMsg handled for {msg.name} from remote {remote_dev_name}"
-                )
-            )
+            buf += data
+            end = len(buf) - len(buf) % width
+            if parser is not None:
+                for offset in range(0, end, width):
+                    msg_num, remote_dev_id = parser.unpack_from(buf, offset)
+                    dispatch_msg(msg_num, remote_dev_id)
+            else:
+                for offset in range(0, end, width):
+                    msg_int = int.from_bytes(buf[offset : offset + width])
+                    dispatch_msg(msg_int >> 8, msg_int & 0xFF)
+            del buf[:end]
 
     async def _new_conn(self, reader: StreamReader, writer: StreamWriter):
         logger.debug(
@@ -173,27 +234,82 @@ class ShortMsgConn(RunnableComponent):
         )
         remote_dev_id = await reader.readexactly(16)
         remote_dev_id_int = int.from_bytes(remote_dev_id, "little")
+        self._tune_transport(writer)
         self._connections[remote_dev_id_int] = (reader, writer)
+        self._start_tx_pump(remote_dev_id_int, writer)
         self._msg_handlers.append(create_task(self._msg_handler(reader, writer)))
 
+    @staticmethod
+    def _tune_transport(writer: StreamWriter):
+        # Messages are tiny and latency bound: no Nagle delay, and only block on a real backlog
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        writer.transport.set_write_buffer_limits(high=SHORT_MSG_DRAIN_THRESHOLD)
+
+    def _start_tx_pump(self, conn_id: int, writer: StreamWriter):
+        self._tx_bufs[conn_id] = bytearray()
+        self._tx_events[conn_id] = Event()
+        self._msg_handlers.append(create_task(self._tx_pump(conn_id, writer)))
+
+    async def _tx_pump(self, conn_id: int, writer: StreamWriter):
+        # Flushes every message queued since the last wakeup with one write; drain returns
+        # at once unless the backlog passed the transport's high-water mark
+        tx_event = self._tx_events[conn_id]
+        transport = writer.transport
+        try:
+            while True:
+                await tx_event.wait()
+                tx_event.clear()
+                if transport.is_closing():
+                    logger.debug(self._create_message(f"ShortMsg connection {conn_id} closed"))
+                    return
+                buf = self._tx_bufs[conn_id]
+                self._tx_bufs[conn_id] = bytearray()
+                transport.write(buf)
+                try:
+                    await writer.drain()
+                except ConnectionError:
+                    logger.debug(self._create_message(f"ShortMsg connection {conn_id} lost"))
+                    return
+        finally:
+            # a reconnect under the same ID may already have replaced this pump's state
+            if self._tx_events.get(conn_id) is tx_event:
+                del self._tx_bufs[conn_id]
+                del self._tx_events[conn_id]
+
+    def _encode_msg(self, msg: ShortMsgBase) -> bytes:
+        val = msg.real_val
+        wire = self._wire_cache.get(val)
+        if wire is None:
+            val_w_dev_id = val << 8 | self._device_id
+            wire = self._wire_cache[val] = val_w_dev_id.to_bytes(length=self._msg_width)
+        return wire
+
     async def send_irq_request(self, request: ShortMsgBase, device: int = 0):
         """
         Sends an ShortMsg request as the client.
+        The message is queued on the connection and written out by its transmit task.
+        Raises ConnectionResetError once the connection is closed.
         """
-        info = f"host sending to device {device}"
-        if not self._server:
-            info = f"device {self._device_id} sending to host"
-        logger.debug(self._create_message(info))
-        _, writer = self._connections[device]
-        val_w_dev_id = request.real_val << 8 | self._device_id
-        writer.write(val_w_dev_id.to_bytes(length=self._msg_width))
-        await writer.drain()
+        if logger.isEnabledFor(logging.DEBUG):
+            info = f"host sending to device {device}"
+            if not self._server:
+                info = f"device {self._device_id} sending to host"
+            logger.debug(self._create_message(info))
+        tx_event = self._tx_events.get(device)
+        if tx_event is None or self._connections[device][1].transport.is_closing():
+            raise ConnectionResetError(f"ShortMsg connection to device {device} is closed")
+        self._tx_bufs[device] += self._encode_msg(request)
+        tx_event.set()
 
     async def start_connection(self):
         reader, writer = await open_connection(self._addr, self._port)
         writer.write(int.to_bytes(self._device_id, 16, "little"))
         await writer.drain()
         self._connections[0] = (reader, writer)
+        self._tune_transport(writer)
+        self._start_tx_pump(0, writer)
         self._run_status = True
 
         self._msg_handlers.append(create_task(self._msg_handler(reader, writer)))
@@ -232,6 +348,11 @@ class ShortMsgConn(RunnableComponent):
         for task in self._tasks:
             task.cancel()
         logger.debug(self._create_message("ShortMsg tasks cancelled"))
+        # hand any messages still queued for transmission over to the transports
+        for conn_id, buf in self._tx_bufs.items():
+            writer = self._connections[conn_id][1]
+            if buf and not writer.transport.is_closing():
+                writer.write(buf)
         for handler in self._msg_handlers:
             handler.cancel()
         logger.debug(self._create_message("ShortMsg handlers cancelled"))
@@ -6,7 +6,7 @@ See LICENSE for details.
 """
 
 import asyncio
-from asyncio import create_task, gather
+from asyncio import Queue, Task, create_task, gather
 from dataclasses import dataclass, field
 from enum import Enum, auto
 from typing import Optional, List, Callable, Coroutine, Any, cast
@@ -75,6 +75,9 @@ class SwitchConnectionManager(RunnableComponent):
             port=self._port,
         )
         self._event_handler = None
+        # Port events are handed to a single notifier task so they are reported in order
+        self._event_queue: Queue[PortUpdateEvent] = Queue()
+        self._event_notifier: Optional[Task] = None
 
     async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
         port_index = None
@@ -83,7 +86,7 @@ class SwitchConnectionManager(RunnableComponent):
             port_index = await self._wait_for_connection_request(reader)
             await self._send_confirmation(writer)
             logger.info(self._create_message(f"Binding incoming connection to port {port_index}"))
-            await self._update_connection_status(port_index, connected=True)
+            self._update_connection_status(port_index, connected=True)
             await self._start_packet_processor(reader, writer, port_index)
         except Exception as e:
             logger.error(
@@ -96,14 +99,28 @@ class SwitchConnectionManager(RunnableComponent):
             await self._send_rejection(writer)
             # Connection closed log printed from ServerComponent
         else:
-            await self._update_connection_status(port_index, connected=False)
+            self._update_connection_status(port_index, connected=False)
             logger.info(self._create_message(f"Closed client connection for port {port_index}"))
 
-    async def _update_connection_status(self, port_id: int, connected: bool):
+    def _update_connection_status(self, port_id: int, connected: bool):
         self._ports[port_id].connected = connected
         if not self._event_handler:
             return
-        await self._event_handler(PortUpdateEvent(port_id=port_id, connected=connected))
+        # Notify without waiting so a slow handler doesn't hold up the connection
+        self._event_queue.put_nowait(PortUpdateEvent(port_id=port_id, connected=connected))
+
+    async def _notify_port_events(self):
+        while True:
+            event = await self._event_queue.get()
+            try:
+                await self._event_handler(event)
+            except Exception as e:
+                logger.error(
+                    self._create_message(
+                        f"{self.__class__.__name__} event handler error: {str(e)}, "
+                        f"{traceback.format_exc()}"
+                    )
+                )
 
     async def _send_confirmation(self, writer: asyncio.StreamWriter):
         sideband_response = BaseSidebandPacket.create(SIDEBAND_TYPES.CONNECTION_ACCEPT)
@@ -172,10 +189,12 @@ class SwitchConnectionManager(RunnableComponent):
             label=f"SwitchPort{port_index}",
         )
         self._ports[port_index].packet_processor = packet_processor
-        tasks = [create_task(packet_processor.run())]
+        task = create_task(packet_processor.run())
         await packet_processor.wait_for_ready()
-        await gather(*tasks)
-        self._ports[port_index].packet_processor = None
+        try:
+            await task
+        finally:
+            self._ports[port_index].packet_processor = None
 
     def get_cxl_connection(self, port: int) -> CxlConnection:
         if port >= len(self._ports):
@@ -195,8 +214,12 @@ class SwitchConnectionManager(RunnableComponent):
         server_task = create_task(self._server_component.run())
         await self._server_component.wait_for_ready()
         self._port = self._server_component.get_port()
+        self._event_notifier = create_task(self._notify_port_events())
         await self._change_status_to_running()
         await server_task
 
     async def _stop(self):
         await self._server_component.stop()
+        if self._event_notifier:
+            self._event_notifier.cancel()
+            await gather(self._event_notifier, return_exceptions=True)
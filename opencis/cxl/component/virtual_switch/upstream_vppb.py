@@ -5,8 +5,6 @@ This software is licensed under the terms of the Revised BSD License.
 See LICENSE for details.
 """
 
-import re
-
 from opencis.util.logger import logger
 from opencis.cxl.component.common import CXL_COMPONENT_TYPE
 from opencis.cxl.component.virtual_switch.vppb import Vppb, VppbRoutingInfo
@@ -15,6 +13,7 @@ from opencis.cxl.component.cxl_bridge_component import (
     CxlUpstreamPortComponent,
     HDM_DECODER_COUNT,
 )
+from opencis.cxl.component.hdm_decoder import HDM_DECODER_COUNT_NUM
 
 
 # UpstreamVppb class will have many similar methods to UpstreamPortDevice class
@@ -46,8 +45,7 @@ class UpstreamVppb(Vppb):
         return CXL_COMPONENT_TYPE.USP
 
     def get_hdm_decoder_count(self) -> int:
-        name = HDM_DECODER_COUNT(self._decoder_count).name
-        return int(re.search(r"\d+", name).group())
+        return HDM_DECODER_COUNT_NUM[self._decoder_count]
 
     def get_cxl_component(self) -> CxlUpstreamPortComponent:
         return self._cxl_component
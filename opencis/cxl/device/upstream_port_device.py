@@ -5,8 +5,6 @@ This software is licensed under the terms of the Revised BSD License.
 See LICENSE for details.
 """
 
-import re
-
 from opencis.cxl.component.cxl_cache_manager import CxlCacheManager
 from opencis.cxl.component.cxl_io_callback_data import CxlIoCallbackData
 from opencis.util.logger import logger
@@ -28,6 +26,7 @@ from opencis.cxl.component.cxl_bridge_component import (
     CxlUpstreamPortComponent,
     HDM_DECODER_COUNT,
 )
+from opencis.cxl.component.hdm_decoder import HDM_DECODER_COUNT_NUM
 from opencis.cxl.component.virtual_switch.vppb_routing_info import VppbRoutingInfo
 from opencis.cxl.component.cxl_mem_manager import CxlMemManager
 from opencis.cxl.component.cxl_io_manager import CxlIoManager
@@ -132,8 +131,7 @@ class UpstreamPortDevice(CxlPortDevice):
         return CXL_COMPONENT_TYPE.USP
 
     def get_hdm_decoder_count(self) -> int:
-        name = HDM_DECODER_COUNT(self._decoder_count).name
-        return int(re.search(r"\d+", name).group())
+        return HDM_DECODER_COUNT_NUM[self._decoder_count]
 
     def get_cxl_component(self) -> CxlUpstreamPortComponent:
         return self._cxl_component
@@ -5,10 +5,11 @@ This software is licensed under the terms of the Revised BSD License.
 See LICENSE for details.
 """
 
-from asyncio import Queue
 from dataclasses import dataclass, field
 from enum import Enum, auto
 
+from opencis.cxl.transport.fast_fifo import FastFifo
+
 
 class CACHE_REQUEST_TYPE(Enum):
     READ = auto()
@@ -22,7 +23,7 @@ class CACHE_REQUEST_TYPE(Enum):
     UNCACHED_READ = auto()
 
 
-@dataclass
+@dataclass(slots=True)
 class CacheRequest:
     type: CACHE_REQUEST_TYPE
     addr: int
@@ -44,7 +45,7 @@ class CACHE_RESPONSE_STATUS(Enum):
     RSP_MISS = auto()
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class CacheResponse:
     status: CACHE_RESPONSE_STATUS
     data: int = 0
@@ -52,5 +53,5 @@ class CacheResponse:
 
 @dataclass
 class CacheFifoPair:
-    request: Queue[CacheRequest] = field(default_factory=Queue)
-    response: Queue[CacheResponse] = field(default_factory=Queue)
+    request: FastFifo[CacheRequest] = field(default_factory=FastFifo)
+    response: FastFifo[CacheResponse] = field(default_factory=FastFifo)
@@ -0,0 +1,75 @@
+"""
+Copyright (c) 2024-2025, Eeum, Inc.
+
+This software is licensed under the terms of the Revised BSD License.
+See LICENSE for details.
+"""
+
+from asyncio import Future, QueueEmpty, get_running_loop
+from collections import deque
+from typing import Deque, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class FastFifo(Generic[T]):
+    """
+    Unbounded FIFO providing the subset of asyncio.Queue used by the transport FIFO pairs
+    (put, get, put_nowait, get_nowait, empty, qsize).
+
+    Without a size limit there are no putters to wake and no task accounting to update, so
+    put is a deque append plus waking the first waiting getter, and get only creates a
+    future when the FIFO is empty.
+    """
+
+    __slots__ = ("_items", "_getters")
+
+    def __init__(self):
+        self._items: Deque[T] = deque()
+        self._getters: Deque[Future] = deque()
+
+    def _wakeup_next_getter(self):
+        getters = self._getters
+        while getters:
+            getter = getters.popleft()
+            if not getter.done():
+                getter.set_result(None)
+                break
+
+    def empty(self) -> bool:
+        return not self._items
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def put_nowait(self, item: T):
+        self._items.append(item)
+        if self._getters:
+            self._wakeup_next_getter()
+
+    async def put(self, item: T):
+        self.put_nowait(item)
+
+    def get_nowait(self) -> T:
+        if not self._items:
+            raise QueueEmpty
+        return self._items.popleft()
+
+    async def get(self) -> T:
+        items = self._items
+        while not items:
+            getter = get_running_loop().create_future()
+            self._getters.append(getter)
+            try:
+                await getter
+            except:
+                getter.cancel()
+                try:
+                    self._getters.remove(getter)
+                except ValueError:
+                    pass
+                # Pass the wakeup on if this getter was woken for an item it will not take
+                if items and not getter.cancelled():
+                    self._wakeup_next_getter()
+                raise
+        return items.popleft()
@@ -5,10 +5,11 @@ This software is licensed under the terms of the Revised BSD License.
 See LICENSE for details.
 """
 
-from asyncio import Queue
 from dataclasses import dataclass, field
 from enum import Enum, auto
 
+from opencis.cxl.transport.fast_fifo import FastFifo
+
 
 class MEMORY_REQUEST_TYPE(Enum):
     READ = auto()
@@ -17,7 +18,7 @@ class MEMORY_REQUEST_TYPE(Enum):
     UNCACHED_WRITE = auto()
 
 
-@dataclass
+@dataclass(slots=True)
 class MemoryRequest:
     type: MEMORY_REQUEST_TYPE
     addr: int
@@ -30,7 +31,7 @@ class MEMORY_RESPONSE_STATUS(Enum):
     FAILED = auto()
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class MemoryResponse:
     status: MEMORY_RESPONSE_STATUS
     data: int = 0
@@ -38,5 +39,5 @@ class MemoryResponse:
 
 @dataclass
 class MemoryFifoPair:
-    request: Queue[MemoryRequest] = field(default_factory=Queue)
-    response: Queue[MemoryResponse] = field(default_factory=Queue)
+    request: FastFifo[MemoryRequest] = field(default_factory=FastFifo)
+    response: FastFifo[MemoryResponse] = field(default_factory=FastFifo)
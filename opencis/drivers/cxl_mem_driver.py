@@ -27,10 +27,9 @@ class CxlMemDriver(LabeledComponent):
         self.scan_mem_devices()
 
     def scan_mem_devices(self):
-        self._devices = []
-        for device in self._cxl_bus_driver.get_devices():
-            if device.device_dvsec:
-                self._devices.append(device)
+        self._devices = [
+            device for device in self._cxl_bus_driver.get_devices() if device.device_dvsec
+        ]
 
     def get_devices(self):
         return self._devices
@@ -5,6 +5,7 @@ This software is licensed under the terms of the Revised BSD License.
 See LICENSE for details.
 """
 
+from dataclasses import dataclass
 from typing import Optional, TypedDict
 
 from opencis.pci.config_space.pci import (
@@ -38,7 +39,8 @@ PCI_CONFIG_OFFSET_MAX = 0xFF
 PCIE_CONFIG_OFFSET_MAX = 0xFFF
 
 
-class PciExpressDeviceConfigSpaceOptions(TypedDict):
+@dataclass(slots=True)
+class PciExpressDeviceConfigSpaceOptions:
     pci_component: PciComponent
 
 
@@ -56,7 +58,7 @@ class PciExpressConfigSpace(BitMaskedBitStructure):
         if options:
             # creating a PCI-only device (non-CXL)
             # assume non-bridge device
-            self._pci_component = options["pci_component"]
+            self._pci_component = options.pci_component
             self._is_bridge = False
             self._fields = []
             start = self._append_pci_fields(self._pci_component.get_identity())
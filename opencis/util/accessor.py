@@ -5,13 +5,55 @@ This software is licensed under the terms of the Revised BSD License.
 See LICENSE for details.
 """
 
+import os
+
+
+def _contiguous_runs(ranges: list[tuple[int, int]]) -> list[tuple[int, int, int]]:
+    # Splits (offset, size) ranges into (offset, start, end) runs of back-to-back ranges
+    runs = []
+    start = 0
+    for index in range(1, len(ranges) + 1):
+        if index == len(ranges) or ranges[index][0] != sum(ranges[index - 1]):
+            runs.append((ranges[start][0], start, index))
+            start = index
+    return runs
+
+
+def _pwritev_all(fd: int, buffers: list[bytes], offset: int):
+    # pwritev() may write fewer bytes than asked; resubmit whatever is left of the run
+    views = [memoryview(buffer) for buffer in buffers if buffer]
+    while views:
+        count = os.pwritev(fd, views, offset)
+        if count == 0:
+            raise OSError(f"pwritev() wrote no bytes at offset 0x{offset:x}")
+        offset += count
+        while views and count >= len(views[0]):
+            count -= len(views.pop(0))
+        if count:
+            views[0] = views[0][count:]
+
+
+def _preadv_all(fd: int, buffers: list[bytearray], offset: int):
+    # preadv() may read fewer bytes than asked; bytes past end of file are left zero, as read()
+    # would return a short read for them
+    views = [memoryview(buffer) for buffer in buffers if buffer]
+    while views:
+        count = os.preadv(fd, views, offset)
+        if count == 0:
+            return
+        offset += count
+        while views and count >= len(views[0]):
+            count -= len(views.pop(0))
+        if count:
+            views[0] = views[0][count:]
+
 
 class FileAccessor:
     def __init__(self, filename: str, size: int):
         self.filename = filename
+        # Extend the emptied file instead of writing zeros; unwritten ranges read back as zero
         with open(filename, "wb") as file:
-            file.write(b"\x00" * size)
-            file.flush()
+            file.truncate(size)
 
     async def write(self, offset: int, data: int, size: int):
         # TODO: Check for OOB and use asyncio
@@ -25,3 +67,39 @@ class FileAccessor:
             file.seek(offset)
             data = file.read(size)
             return int.from_bytes(data, byteorder="little")
+
+    async def writev(self, requests: list[tuple[int, int, int]]):
+        """Writes (offset, data, size) requests, one pwritev() per contiguous run"""
+        buffers = [data.to_bytes(size, byteorder="little") for _, data, size in requests]
+        if not hasattr(os, "pwritev"):
+            # pwritev() is POSIX-only; fall back to one seek and write per request
+            with open(self.filename, "r+b") as file:
+                for (offset, _, _), buffer in zip(requests, buffers):
+                    file.seek(offset)
+                    file.write(buffer)
+            return
+        ranges = [(offset, size) for offset, _, size in requests]
+        fd = os.open(self.filename, os.O_WRONLY)
+        try:
+            for offset, start, end in _contiguous_runs(ranges):
+                _pwritev_all(fd, buffers[start:end], offset)
+        finally:
+            os.close(fd)
+
+    async def readv(self, requests: list[tuple[int, int]]) -> list[int]:
+        """Reads (offset, size) requests, one preadv() per contiguous run"""
+        buffers = [bytearray(size) for _, size in requests]
+        if not hasattr(os, "preadv"):
+            # preadv() is POSIX-only; fall back to one seek and read per request
+            with open(self.filename, "rb") as file:
+                for (offset, _), buffer in zip(requests, buffers):
+                    file.seek(offset)
+                    file.readinto(buffer)
+        else:
+            fd = os.open(self.filename, os.O_RDONLY)
+            try:
+                for offset, start, end in _contiguous_runs(requests):
+                    _preadv_all(fd, buffers[start:end], offset)
+            finally:
+                os.close(fd)
+        return [int.from_bytes(buffer, byteorder="little") for buffer in buffers]
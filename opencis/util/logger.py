@@ -71,6 +71,7 @@ class MyLogger(logging.getLoggerClass()):
         self._stdout_hdlr.setLevel(self._name_to_level[loglevel])
         self._stdout_hdlr.setFormatter(formatter)
         self.addHandler(self._stdout_hdlr)
+        self._update_level()
 
     def create_log_file(
         self,
@@ -91,6 +92,12 @@ class MyLogger(logging.getLoggerClass()):
         file_handler.setLevel(self._name_to_level[loglevel])
         file_handler.setFormatter(formatter)
         logger.addHandler(file_handler)
+        self._update_level()
+
+    def _update_level(self):
+        # Records below every handler's level are dropped anyway; raising the logger level
+        # lets isEnabledFor() reject them before any message formatting happens
+        self.setLevel(min((h.level for h in self.handlers), default=logging.NOTSET))
 
     def hexdump(self, loglevel, data, *args, **kwargs):
         addr = 0
@@ -6,32 +6,53 @@ See LICENSE for details.
 """
 
 import atexit
-from functools import partial
+from functools import lru_cache
 import os
 import sys
 
+# Bins handed out by get_memory_bin_name, removed by a single exit handler
+_bin_names_to_remove: list[str] = []
 
-def get_memory_bin_name(index_primary: int = 0, index_secondary: int = -1) -> str:
-    def cleanup(path):
+
+@atexit.register
+def _remove_memory_bins():
+    for bin_name in _bin_names_to_remove:
         try:
-            os.remove(path)
+            os.remove(bin_name)
         except Exception:
             pass
 
+
+@lru_cache(maxsize=None)
+def _get_taken_bin_names(func_name: str) -> set[str]:
+    # Scanned once per caller; only a fast first filter, since other processes create bins too
+    prefix = f"mem_{func_name}_"
+    with os.scandir(".") as entries:
+        return {entry.name for entry in entries if entry.name.startswith(prefix)}
+
+
+def get_memory_bin_name(index_primary: int = 0, index_secondary: int = -1) -> str:
     # Get caller function name
     # pylint: disable=protected-access
     func_name = sys._getframe(1).f_code.co_name
+    taken_bin_names = _get_taken_bin_names(func_name)
 
     while True:
         if index_secondary != -1:
             bin_name = f"mem_{func_name}_{index_primary}-{index_secondary}.bin"
         else:
             bin_name = f"mem_{func_name}_{index_primary}.bin"
-        # Check if the bin name already exists
-        if not os.path.exists(bin_name):
-            break
+        # Claim the bin by creating it, so no other process is handed the same name
+        if bin_name not in taken_bin_names:
+            try:
+                os.close(os.open(bin_name, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                break
+            except FileExistsError:
+                pass
+        taken_bin_names.add(bin_name)
         index_primary += 1
+    taken_bin_names.add(bin_name)
 
     # Make sure we remove it upon exit
-    atexit.register(partial(cleanup, bin_name))
+    _bin_names_to_remove.append(bin_name)
     return bin_name
@@ -103,21 +103,26 @@ class ServerComponent(RunnableComponent):
     async def _stop(self):
         logger.info(self._create_message(f"Cancelling {self._descriptor} task"))
         self._server_task.cancel()
-        for client in self._clients.copy():
+        clients = list(self._clients)
+        self._clients.clear()
+        for client in clients:
             logger.info(
                 self._create_message(
                     f'Closing client connection: {client.get_extra_info("peername")}'
                 )
             )
             client.close()
-        for client in self._clients.copy():
-            await client.wait_closed()
-            logger.info(
-                self._create_message(
-                    f'Closed client connection: {client.get_extra_info("peername")}'
+        results = await asyncio.gather(
+            *(client.wait_closed() for client in clients), return_exceptions=True
+        )
+        for client, result in zip(clients, results):
+            description = client.get_extra_info("peername")
+            if isinstance(result, Exception):
+                logger.error(
+                    self._create_message(f"Error while closing {description}: {str(result)}")
                 )
-            )
-        self._clients.clear()
+            else:
+                logger.info(self._create_message(f"Closed client connection: {description}"))
         try:
             await self._server_task
         except CancelledError:
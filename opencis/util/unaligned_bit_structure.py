@@ -17,6 +17,7 @@ from typing import (
 from dataclasses import dataclass, field
 from enum import Enum, auto
 import inspect
+from struct import Struct
 
 from opencis.util.logger import logger
 
@@ -125,6 +126,8 @@ class StructureField:
 
 DataField = Union[BitField, ByteField, DynamicByteField, StructureField]
 BITS_IN_BYTE = 8
+# Little-endian codecs for byte fields that map onto a native unsigned integer
+BYTE_FIELD_STRUCTS = {1: Struct("<B"), 2: Struct("<H"), 4: Struct("<I"), 8: Struct("<Q")}
 
 
 @dataclass
@@ -293,9 +296,13 @@ class ShareableByteArray:
         return result
 
     def copy_from(self, data: "ShareableByteArray", dest_offset: int = 0):
-        for byte in bytes(data):
-            self[dest_offset] = byte
-            dest_offset += 1
+        data = bytes(data)
+        start = self.offset + dest_offset
+        end = start + len(data)
+        # slice assignment would silently grow the buffer instead of raising
+        if end > len(self._data):
+            raise IndexError("bytearray index out of range")
+        self._data[start:end] = data
 
     def create_shared(
         self, size: Optional[int] = None, offset: Optional[int] = None
@@ -522,14 +529,34 @@ class UnalignedBitStructure:
 
             return getter
 
+        def make_struct_setter(start_offset: int, field_struct: Struct):
+            def setter(self: "UnalignedBitStructure", value: int):
+                data = self._data
+                field_struct.pack_into(data._data, data.offset + start_offset, value)
+
+            return setter
+
+        def make_struct_getter(start_offset: int, field_struct: Struct):
+            def getter(self: "UnalignedBitStructure") -> int:
+                data = self._data
+                return field_struct.unpack_from(data._data, data.offset + start_offset)[0]
+
+            return getter
+
         if field.default > 0:
             self._data.write_bytes(field.start, field.end, field.default)
 
-        setattr(
-            self.__class__,
-            field.name,
-            property(make_getter(field.start, field.end), make_setter(field.start, field.end)),
-        )
+        field_struct = BYTE_FIELD_STRUCTS.get(field.end - field.start + 1)
+        if field_struct is not None:
+            accessors = property(
+                make_struct_getter(field.start, field_struct),
+                make_struct_setter(field.start, field_struct),
+            )
+        else:
+            accessors = property(
+                make_getter(field.start, field.end), make_setter(field.start, field.end)
+            )
+        setattr(self.__class__, field.name, accessors)
 
     def _add_dynamic_byte_field(self: "UnalignedBitStructure", field: DynamicByteFieldInstance):
         self._add_field_name(field.name)
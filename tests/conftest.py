@@ -8,14 +8,12 @@ See LICENSE for details.
 import pytest
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def get_gold_std_reg_vals():
+    with open("tests/regvals.txt") as f:
+        reg_vals = dict(line.strip().split(":", 1) for line in f)
+
     def _get_gold_std_reg_vals(device_type: str):
-        with open("tests/regvals.txt") as f:
-            for line in f:
-                (k, v) = line.strip().split(":")
-                if k == device_type:
-                    return v
-        return None
+        return reg_vals.get(device_type)
 
     return _get_gold_std_reg_vals
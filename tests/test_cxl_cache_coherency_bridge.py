@@ -5,8 +5,9 @@ This software is licensed under the terms of the Revised BSD License.
 See LICENSE for details.
 """
 
-import asyncio
+from functools import lru_cache
 import pytest
+import pytest_asyncio
 
 from opencis.cxl.transport.transaction import (
     CxlCacheCacheH2DDataPacket,
@@ -22,6 +23,7 @@ from opencis.cxl.component.root_complex.cache_coherency_bridge import (
     CacheCoherencyBridge,
     CacheCoherencyBridgeConfig,
 )
+from opencis.cxl.component.cache_controller import COH_STATE_MACHINE
 from opencis.cxl.transport.memory_fifo import (
     MemoryFifoPair,
     MemoryResponse,
@@ -39,9 +41,28 @@ from opencis.pci.component.fifo_pair import FifoPair
 
 # pylint: disable=protected-access, redefined-outer-name
 
+# All tests share the module-scoped bridge, so they must run on its event loop
+pytestmark = pytest.mark.asyncio(loop_scope="module")
 
-@pytest.fixture
-def cxl_cache_coh_bridge():
+# Responses are frozen dataclasses, so one instance of each can be sent repeatedly
+MEM_RESP_READ_OK = MemoryResponse(MEMORY_RESPONSE_STATUS.OK, 0xDEADBEEF)
+MEM_RESP_WRITE_OK = MemoryResponse(MEMORY_RESPONSE_STATUS.OK)
+CACHE_RESP_OK = CacheResponse(CACHE_RESPONSE_STATUS.OK)
+
+
+# The bridge never modifies incoming D2H packets, so identical ones can be reused
+@lru_cache(maxsize=None)
+def _d2h_req(addr: int, cache_id: int, opcode: CXL_CACHE_D2HREQ_OPCODE):
+    return CxlCacheCacheD2HReqPacket.create(addr, cache_id, opcode)
+
+
+@lru_cache(maxsize=None)
+def _d2h_rsp(cache_id: int, opcode: CXL_CACHE_D2HRSP_OPCODE):
+    return CxlCacheCacheD2HRspPacket.create(cache_id, opcode)
+
+
+@pytest_asyncio.fixture(scope="module", loop_scope="module")
+async def cxl_cache_coh_bridge():
     # Define the necessary configuration for the CacheCoherencyBridge
     config = CacheCoherencyBridgeConfig(
         host_name="MyDevice",
@@ -50,21 +71,51 @@ def cxl_cache_coh_bridge():
         upstream_coh_bridge_to_cache_fifo=CacheFifoPair(),
         downstream_cxl_cache_fifos=FifoPair(),
     )
-    return CacheCoherencyBridge(config)
+    # The bridge is started once and shared by all tests in this module
+    ccb = CacheCoherencyBridge(config)
+    run_task = await ccb.run_wait_ready()
+    yield ccb
+    await ccb.stop()
+    await run_task
+
+
+def _drain_fifos(ccb: CacheCoherencyBridge):
+    for queue in (
+        ccb._memory_producer_fifos.request,
+        ccb._memory_producer_fifos.response,
+        ccb._upstream_cache_to_coh_bridge_fifo.request,
+        ccb._upstream_cache_to_coh_bridge_fifo.response,
+        ccb._upstream_coh_bridge_to_cache_fifo.request,
+        ccb._upstream_coh_bridge_to_cache_fifo.response,
+        ccb._downstream_cxl_cache_fifos.host_to_target,
+        ccb._downstream_cxl_cache_fifos.target_to_host,
+        ccb._cxl_channel.d2h_req,
+        ccb._cxl_channel.d2h_rsp,
+        ccb._cxl_channel.d2h_data,
+    ):
+        while not queue.empty():
+            queue.get_nowait()
+    # A test that failed mid-snoop leaves the state machine waiting on a response
+    ccb._cur_state.state = COH_STATE_MACHINE.COH_STATE_INIT
+
+
+@pytest.fixture(autouse=True)
+def drain_cxl_cache_coh_bridge(cxl_cache_coh_bridge):
+    # Packets left over by a failing test must not leak into the next one
+    yield
+    _drain_fifos(cxl_cache_coh_bridge)
 
 
 async def flush_memory_read(ccb: CacheCoherencyBridge):
     mem_req = await ccb._memory_producer_fifos.request.get()
     assert mem_req.type == MEMORY_REQUEST_TYPE.READ
-    mem_resp = MemoryResponse(MEMORY_RESPONSE_STATUS.OK, 0xDEADBEEF)
-    await ccb._memory_producer_fifos.response.put(mem_resp)
+    ccb._memory_producer_fifos.response.put_nowait(MEM_RESP_READ_OK)
 
 
 async def flush_memory_write(ccb: CacheCoherencyBridge):
     mem_req = await ccb._memory_producer_fifos.request.get()
     assert mem_req.type == MEMORY_REQUEST_TYPE.WRITE
-    mem_resp = MemoryResponse(MEMORY_RESPONSE_STATUS.OK)
-    await ccb._memory_producer_fifos.response.put(mem_resp)
+    ccb._memory_producer_fifos.response.put_nowait(MEM_RESP_WRITE_OK)
 
 
 async def send_cache_req_read(
@@ -72,7 +123,7 @@ async def send_cache_req_read(
     req: CacheRequest,
 ) -> MemoryResponse:
     data = 0xDEADBEEF
-    await ccb._upstream_cache_to_coh_bridge_fifo.request.put(req)
+    ccb._upstream_cache_to_coh_bridge_fifo.request.put_nowait(req)
     await flush_memory_read(ccb)
     resp = await ccb._upstream_cache_to_coh_bridge_fifo.response.get()
     assert resp.data == data
@@ -83,7 +134,7 @@ async def send_cache_req_read_no_mem(
     ccb: CacheCoherencyBridge,
     req: CacheRequest,
 ) -> MemoryResponse:
-    await ccb._upstream_cache_to_coh_bridge_fifo.request.put(req)
+    ccb._upstream_cache_to_coh_bridge_fifo.request.put_nowait(req)
     resp = await ccb._upstream_cache_to_coh_bridge_fifo.response.get()
     return resp
 
@@ -92,7 +143,7 @@ async def send_cache_req_write(
     ccb: CacheCoherencyBridge,
     req: CacheRequest,
 ) -> MemoryResponse:
-    await ccb._upstream_cache_to_coh_bridge_fifo.request.put(req)
+    ccb._upstream_cache_to_coh_bridge_fifo.request.put_nowait(req)
     await flush_memory_write(ccb)
     resp = await ccb._upstream_cache_to_coh_bridge_fifo.response.get()
     return resp
@@ -102,28 +153,24 @@ async def send_cache_req_write_no_mem(
     ccb: CacheCoherencyBridge,
     req: CacheRequest,
 ) -> MemoryResponse:
-    await ccb._upstream_cache_to_coh_bridge_fifo.request.put(req)
+    ccb._upstream_cache_to_coh_bridge_fifo.request.put_nowait(req)
     resp = await ccb._upstream_cache_to_coh_bridge_fifo.response.get()
     return resp
 
 
-@pytest.mark.asyncio
 async def test_cache_coh_bridge_d2h_req(cxl_cache_coh_bridge):
     ccb: CacheCoherencyBridge
     ccb = cxl_cache_coh_bridge
-    run_task = await ccb.run_wait_ready()
 
     ccb.set_cache_coh_dev_count(2)
 
     # D2H request: CACHE_RD_SHARED
     addr = 0x40
-    device_req = CxlCacheCacheD2HReqPacket.create(addr, 0, CXL_CACHE_D2HREQ_OPCODE.CACHE_RD_SHARED)
+    device_req = _d2h_req(addr, 0, CXL_CACHE_D2HREQ_OPCODE.CACHE_RD_SHARED)
     await ccb._downstream_cxl_cache_fifos.target_to_host.put(device_req)
     cache_req = await ccb._upstream_coh_bridge_to_cache_fifo.request.get()
     assert cache_req.addr == addr
-    await ccb._upstream_coh_bridge_to_cache_fifo.response.put(
-        CacheResponse(CACHE_RESPONSE_STATUS.OK)
-    )
+    await ccb._upstream_coh_bridge_to_cache_fifo.response.put(CACHE_RESP_OK)
     resp = await ccb._downstream_cxl_cache_fifos.host_to_target.get()
     assert resp.h2drsp_header.cache_opcode == CXL_CACHE_H2DRSP_OPCODE.GO
     resp = await ccb._downstream_cxl_cache_fifos.host_to_target.get()
@@ -131,7 +178,7 @@ async def test_cache_coh_bridge_d2h_req(cxl_cache_coh_bridge):
 
     # D2H request: CACHE_DIRTY_EVICT
     addr = 0x80
-    req = CxlCacheCacheD2HReqPacket.create(addr, 0, CXL_CACHE_D2HREQ_OPCODE.CACHE_DIRTY_EVICT)
+    req = _d2h_req(addr, 0, CXL_CACHE_D2HREQ_OPCODE.CACHE_DIRTY_EVICT)
     await ccb._downstream_cxl_cache_fifos.target_to_host.put(req)
     resp = await ccb._downstream_cxl_cache_fifos.host_to_target.get()
     assert resp.h2drsp_header.cache_opcode == CXL_CACHE_H2DRSP_OPCODE.GO_WRITE_PULL
@@ -142,29 +189,21 @@ async def test_cache_coh_bridge_d2h_req(cxl_cache_coh_bridge):
 
     # D2H request: CACHE_RD_OWN_NO_DATA
     addr = 0x100
-    req = CxlCacheCacheD2HReqPacket.create(addr, 0, CXL_CACHE_D2HREQ_OPCODE.CACHE_RD_OWN_NO_DATA)
+    req = _d2h_req(addr, 0, CXL_CACHE_D2HREQ_OPCODE.CACHE_RD_OWN_NO_DATA)
     await ccb._downstream_cxl_cache_fifos.target_to_host.put(req)
     req = await ccb._upstream_coh_bridge_to_cache_fifo.request.get()
-    await ccb._upstream_coh_bridge_to_cache_fifo.response.put(
-        CacheResponse(CACHE_RESPONSE_STATUS.OK)
-    )
+    await ccb._upstream_coh_bridge_to_cache_fifo.response.put(CACHE_RESP_OK)
     resp = await ccb._downstream_cxl_cache_fifos.host_to_target.get()
     assert resp.h2drsp_header.cache_opcode == CXL_CACHE_H2DRSP_OPCODE.GO
 
-    await ccb.stop()
-    asyncio.gather(run_task)
-
 
 async def setup_cacheline(ccb: CacheCoherencyBridge, addr: int, cache_id: int):
-    device_req = CxlCacheCacheD2HReqPacket.create(
-        addr, cache_id, CXL_CACHE_D2HREQ_OPCODE.CACHE_RD_SHARED
-    )
-    await ccb._downstream_cxl_cache_fifos.target_to_host.put(device_req)
+    device_req = _d2h_req(addr, cache_id, CXL_CACHE_D2HREQ_OPCODE.CACHE_RD_SHARED)
+    # The host cache response is posted up front; the bridge reads it right after its request
+    ccb._downstream_cxl_cache_fifos.target_to_host.put_nowait(device_req)
+    ccb._upstream_coh_bridge_to_cache_fifo.response.put_nowait(CACHE_RESP_OK)
     cache_req = await ccb._upstream_coh_bridge_to_cache_fifo.request.get()
     assert cache_req.type == CACHE_REQUEST_TYPE.SNP_DATA
-    await ccb._upstream_coh_bridge_to_cache_fifo.response.put(
-        CacheResponse(CACHE_RESPONSE_STATUS.OK)
-    )
     resp = await ccb._downstream_cxl_cache_fifos.host_to_target.get()
     assert resp.h2drsp_header.cache_opcode == CXL_CACHE_H2DRSP_OPCODE.GO
     resp = await ccb._downstream_cxl_cache_fifos.host_to_target.get()
@@ -184,82 +223,92 @@ async def cache_request_test(
     await setup_cacheline(ccb, addr, 0)
 
     # Actual Test
+    # The device response is only consumed once the bridge has sent its snoop
     cache_req = CacheRequest(cache_req_type, addr, 0x40)
-    await ccb._upstream_cache_to_coh_bridge_fifo.request.put(cache_req)
+    ccb._upstream_cache_to_coh_bridge_fifo.request.put_nowait(cache_req)
+    ccb._downstream_cxl_cache_fifos.target_to_host.put_nowait(_d2h_rsp(0, d2hrsp_opcode))
     req = await ccb._downstream_cxl_cache_fifos.host_to_target.get()
     if h2dreq_opcode:
         assert req.h2dreq_header.cache_opcode == h2dreq_opcode
-    resp = CxlCacheCacheD2HRspPacket.create(0, d2hrsp_opcode)
-    await ccb._downstream_cxl_cache_fifos.target_to_host.put(resp)
 
     if mem_flush:
         await flush_memory_read(ccb)
 
     if d2h_data:
         data_packet = CxlCacheCacheD2HDataPacket.create(0, 0xDEADBEEF)
-        await ccb._downstream_cxl_cache_fifos.target_to_host.put(data_packet)
-
-
-@pytest.mark.asyncio
-async def test_cache_coh_bridge_cache_request(cxl_cache_coh_bridge):
+        ccb._downstream_cxl_cache_fifos.target_to_host.put_nowait(data_packet)
+
+    return await ccb._upstream_cache_to_coh_bridge_fifo.response.get()
+
+
+# TODO: exhaust all scenarios using Table 3-26
+# If using *FWD*, set d2h_data to True
+# If using *HIT*, set d2h_data to False
+@pytest.mark.parametrize(
+    "addr, cache_req_type, h2dreq_opcode, d2hrsp_opcode, mem_flush, d2h_data, expected_status",
+    [
+        (
+            0x40,
+            CACHE_REQUEST_TYPE.SNP_INV,
+            CXL_CACHE_H2DREQ_OPCODE.SNP_INV,
+            CXL_CACHE_D2HRSP_OPCODE.RSP_I_HIT_I,
+            True,
+            False,
+            CACHE_RESPONSE_STATUS.RSP_I,
+        ),
+        (
+            0x40,
+            CACHE_REQUEST_TYPE.SNP_DATA,
+            CXL_CACHE_H2DREQ_OPCODE.SNP_DATA,
+            CXL_CACHE_D2HRSP_OPCODE.RSP_S_HIT_SE,
+            True,
+            False,
+            CACHE_RESPONSE_STATUS.RSP_S,
+        ),
+        (
+            0x40,
+            CACHE_REQUEST_TYPE.SNP_CUR,
+            CXL_CACHE_H2DREQ_OPCODE.SNP_CUR,
+            CXL_CACHE_D2HRSP_OPCODE.RSP_I_FWD_M,
+            True,
+            True,
+            CACHE_RESPONSE_STATUS.RSP_I,
+        ),
+        (
+            0x80,
+            CACHE_REQUEST_TYPE.SNP_CUR,
+            CXL_CACHE_H2DREQ_OPCODE.SNP_CUR,
+            CXL_CACHE_D2HRSP_OPCODE.RSP_V_FWD_V,
+            False,
+            True,
+            CACHE_RESPONSE_STATUS.RSP_M,
+        ),
+    ],
+)
+async def test_cache_coh_bridge_cache_request(
+    cxl_cache_coh_bridge,
+    addr: int,
+    cache_req_type: CACHE_REQUEST_TYPE,
+    h2dreq_opcode: CXL_CACHE_H2DREQ_OPCODE,
+    d2hrsp_opcode: CXL_CACHE_D2HRSP_OPCODE,
+    mem_flush: bool,
+    d2h_data: bool,
+    expected_status: CACHE_RESPONSE_STATUS,
+):
     ccb: CacheCoherencyBridge
     ccb = cxl_cache_coh_bridge
-    run_task = await ccb.run_wait_ready()
 
     ccb.set_cache_coh_dev_count(2)
 
-    # TODO: exhaust all scenarios using Table 3-26
-    # If using *FWD*, set d2h_data to True
-    # If using *HIT*, set d2h_data to False
-    addr = 0x40
-    await cache_request_test(
-        ccb,
-        addr,
-        CACHE_REQUEST_TYPE.SNP_INV,
-        CXL_CACHE_H2DREQ_OPCODE.SNP_INV,
-        CXL_CACHE_D2HRSP_OPCODE.RSP_I_HIT_I,
-        True,
-        False,
-    )
-    await cache_request_test(
-        ccb,
-        addr,
-        CACHE_REQUEST_TYPE.SNP_DATA,
-        CXL_CACHE_H2DREQ_OPCODE.SNP_DATA,
-        CXL_CACHE_D2HRSP_OPCODE.RSP_S_HIT_SE,
-        True,
-        False,
-    )
-    await cache_request_test(
-        ccb,
-        addr,
-        CACHE_REQUEST_TYPE.SNP_CUR,
-        CXL_CACHE_H2DREQ_OPCODE.SNP_CUR,
-        CXL_CACHE_D2HRSP_OPCODE.RSP_I_FWD_M,
-        True,
-        True,
-    )
-
-    addr = 0x80
-    await cache_request_test(
-        ccb,
-        addr,
-        CACHE_REQUEST_TYPE.SNP_CUR,
-        CXL_CACHE_H2DREQ_OPCODE.SNP_CUR,
-        CXL_CACHE_D2HRSP_OPCODE.RSP_V_FWD_V,
-        False,
-        True,
+    resp = await cache_request_test(
+        ccb, addr, cache_req_type, h2dreq_opcode, d2hrsp_opcode, mem_flush, d2h_data
     )
+    assert resp.status == expected_status
 
-    await ccb.stop()
-    asyncio.gather(run_task)
 
-
-@pytest.mark.asyncio
 async def test_cache_coh_bridge_cache_snoop_filter_miss(cxl_cache_coh_bridge):
     ccb: CacheCoherencyBridge
     ccb = cxl_cache_coh_bridge
-    run_task = await ccb.run_wait_ready()
 
     ccb.set_cache_coh_dev_count(2)
 
@@ -282,6 +331,3 @@ async def test_cache_coh_bridge_cache_snoop_filter_miss(cxl_cache_coh_bridge):
     req = CacheRequest(CACHE_REQUEST_TYPE.SNP_INV, 0, 0x40)
     resp = await send_cache_req_read_no_mem(ccb, req)
     assert resp.status == CACHE_RESPONSE_STATUS.RSP_I
-
-    await ccb.stop()
-    asyncio.gather(run_task)
@@ -7,6 +7,7 @@ See LICENSE for details.
 
 import asyncio
 import pytest
+import pytest_asyncio
 
 from opencis.cxl.component.cache_controller import (
     CacheController,
@@ -33,9 +34,32 @@ from opencis.cxl.transport.cache_fifo import (
 CACHE_NUM_ASSOC = 4
 CACHE_NUM_SETS = 1
 
+# CacheResponse is frozen, so each status needs only one shared instance
+CACHE_RESP_OK = CacheResponse(CACHE_RESPONSE_STATUS.OK)
+CACHE_RESP_RSP_I = CacheResponse(CACHE_RESPONSE_STATUS.RSP_I)
 
-@pytest.fixture
-def cxl_host_cache_controller():
+
+# The shared host controller is stopped at module teardown and a DCOH controller within its
+# own test, so one loop can serve the whole session
+pytestmark = pytest.mark.asyncio(loop_scope="session")
+
+
+@pytest_asyncio.fixture(autouse=True, loop_scope="session")
+async def eager_task_factory():
+    # Tasks start running inline up to their first suspension (Python 3.12+)
+    if not hasattr(asyncio, "eager_task_factory"):
+        yield
+        return
+    loop = asyncio.get_running_loop()
+    prev_factory = loop.get_task_factory()
+    loop.set_task_factory(asyncio.eager_task_factory)
+    yield
+    # The session loop is shared with other modules
+    loop.set_task_factory(prev_factory)
+
+
+@pytest_asyncio.fixture(scope="module", loop_scope="session")
+async def cxl_host_cache_controller_module():
     config = CacheControllerConfig(
         component_name="MyDevice",
         processor_to_cache_fifo=MemoryFifoPair(),
@@ -46,7 +70,41 @@ def cxl_host_cache_controller():
         cache_num_assoc=CACHE_NUM_ASSOC,
         cache_num_set=CACHE_NUM_SETS,
     )
-    return CacheController(config)
+    cc = CacheController(config)
+    task = await cc.run_wait_ready()
+    yield cc
+    await cc.stop()
+    await task
+
+
+@pytest.fixture
+def cxl_host_cache_controller(cxl_host_cache_controller_module):
+    # One running host controller serves the module; each test starts from an empty cache
+    cc = cxl_host_cache_controller_module
+    cc.init_cache()
+    cc._memory_ranges.clear()
+    cc._update_range_index()
+    return cc
+
+
+def _drain_fifos(cc: CacheController):
+    for fifo_pair in (
+        cc._processor_to_cache_fifo,
+        cc._cache_to_coh_agent_fifo,
+        cc._coh_agent_to_cache_fifo,
+        cc._cache_to_coh_bridge_fifo,
+        cc._coh_bridge_to_cache_fifo,
+    ):
+        for queue in (fifo_pair.request, fifo_pair.response):
+            while not queue.empty():
+                queue.get_nowait()
+
+
+@pytest.fixture(autouse=True)
+def drain_cxl_host_cache_controller(cxl_host_cache_controller_module):
+    # Packets left over by a failing test must not leak into the next one
+    yield
+    _drain_fifos(cxl_host_cache_controller_module)
 
 
 @pytest.fixture
@@ -70,14 +128,14 @@ async def send_cache_req(
 ) -> MemoryResponse:
     if cc._processor_to_cache_fifo is None:
         cache_fifo = cc._coh_agent_to_cache_fifo
+    elif cc.get_mem_addr_type(req.addr) is MEM_ADDR_TYPE.DRAM:
+        cache_fifo = cc._coh_bridge_to_cache_fifo
     else:
-        if cc.get_mem_addr_type(req.addr) == MEM_ADDR_TYPE.DRAM:
-            cache_fifo = cc._coh_bridge_to_cache_fifo
-        else:
-            cache_fifo = cc._coh_agent_to_cache_fifo
-    await cache_fifo.request.put(req)
-    resp = await cache_fifo.response.get()
-    return resp
+        cache_fifo = cc._coh_agent_to_cache_fifo
+    put = cache_fifo.request.put
+    get = cache_fifo.response.get
+    await put(req)
+    return await get()
 
 
 async def send_cached_mem_request(
@@ -86,17 +144,21 @@ async def send_cached_mem_request(
     is_cache_wb: bool,
     is_cache_snp: bool = False,
 ) -> MemoryResponse:
-    await cc._processor_to_cache_fifo.request.put(req)
+    processor_fifo = cc._processor_to_cache_fifo
+    coh_agent_fifo = cc._cache_to_coh_agent_fifo
+    # The controller waits for the write-back response before snooping, so post both
+    # responses up front and check the requests afterwards
+    for _ in range(is_cache_wb + is_cache_snp):
+        coh_agent_fifo.response.put_nowait(CACHE_RESP_OK)
+    await processor_fifo.request.put(req)
     if is_cache_wb:
-        cache_req = await cc._cache_to_coh_agent_fifo.request.get()
-        await cc._cache_to_coh_agent_fifo.response.put(CacheResponse(CACHE_RESPONSE_STATUS.OK))
-        assert cache_req.type == CACHE_REQUEST_TYPE.WRITE_BACK
+        cache_req = await coh_agent_fifo.request.get()
+        assert cache_req.type is CACHE_REQUEST_TYPE.WRITE_BACK
     if is_cache_snp:
-        cache_req = await cc._cache_to_coh_agent_fifo.request.get()
-        await cc._cache_to_coh_agent_fifo.response.put(CacheResponse(CACHE_RESPONSE_STATUS.OK))
-        assert cache_req.type == CACHE_REQUEST_TYPE.SNP_DATA
-    resp = await cc._processor_to_cache_fifo.response.get()
-    assert resp.status == MEMORY_RESPONSE_STATUS.OK
+        cache_req = await coh_agent_fifo.request.get()
+        assert cache_req.type is CACHE_REQUEST_TYPE.SNP_DATA
+    resp = await processor_fifo.response.get()
+    assert resp.status is MEMORY_RESPONSE_STATUS.OK
     return resp
 
 
@@ -104,34 +166,34 @@ async def send_uncached_mem_request(
     cc: CacheController,
     req: MemoryRequest,
 ) -> MemoryResponse:
-    await cc._processor_to_cache_fifo.request.put(req)
-    cache_req = await cc._cache_to_coh_agent_fifo.request.get()
-    await cc._cache_to_coh_agent_fifo.response.put(CacheResponse(CACHE_RESPONSE_STATUS.OK))
+    processor_fifo = cc._processor_to_cache_fifo
+    coh_agent_fifo = cc._cache_to_coh_agent_fifo
+    await processor_fifo.request.put(req)
+    cache_req = await coh_agent_fifo.request.get()
+    await coh_agent_fifo.response.put(CACHE_RESP_OK)
     assert cache_req.type in (CACHE_REQUEST_TYPE.UNCACHED_WRITE, CACHE_REQUEST_TYPE.UNCACHED_READ)
-    resp = await cc._processor_to_cache_fifo.response.get()
-    assert resp.status == MEMORY_RESPONSE_STATUS.OK
+    resp = await processor_fifo.response.get()
+    assert resp.status is MEMORY_RESPONSE_STATUS.OK
     return resp
 
 
-@pytest.mark.asyncio
 async def test_cxl_host_cc_mem_req(cxl_host_cache_controller):
     cc: CacheController
     cc = cxl_host_cache_controller
-    tasks = []
-    tasks.append(await cc.run_wait_ready())
-
     cc.add_mem_range(0x0, 0x1000, MEM_ADDR_TYPE.CXL_CACHED)
 
-    # Fill cache blocks
-    for i in range(CACHE_NUM_ASSOC):
-        addr = i * 0x40
-        req = MemoryRequest(MEMORY_REQUEST_TYPE.WRITE, addr, 0x40, 0x1111111111111111)
-        await send_cached_mem_request(cc, req, False)
+    # Fill cache blocks; each fill posts its request before its first suspension,
+    # so the controller still sees them in order
+    fill_reqs = [
+        MemoryRequest(MEMORY_REQUEST_TYPE.WRITE, i * 0x40, 0x40, 0x1111111111111111)
+        for i in range(CACHE_NUM_ASSOC)
+    ]
+    await asyncio.gather(*(send_cached_mem_request(cc, req, False) for req in fill_reqs))
 
     # cache miss write: write-back only
     addr = CACHE_NUM_ASSOC * 0x40
     mem_req = MemoryRequest(MEMORY_REQUEST_TYPE.WRITE, addr, 0x40, 0xDEADBEEFDEADBEEF)
-    resp = await send_cached_mem_request(cc, mem_req, True)
+    await send_cached_mem_request(cc, mem_req, True)
 
     # cache hit read
     addr = CACHE_NUM_ASSOC * 0x40
@@ -148,19 +210,12 @@ async def test_cxl_host_cc_mem_req(cxl_host_cache_controller):
     # cache hit write
     addr = 0
     mem_req = MemoryRequest(MEMORY_REQUEST_TYPE.WRITE, addr, 0x40, 0xDEADBEEFDEADBEEF)
-    resp = await send_cached_mem_request(cc, mem_req, False, False)
-
-    await cc.stop()
-    asyncio.gather(*tasks)
+    await send_cached_mem_request(cc, mem_req, False, False)
 
 
-@pytest.mark.asyncio
 async def test_cxl_host_cc_cache_invalid(cxl_host_cache_controller):
     cc: CacheController
     cc = cxl_host_cache_controller
-    tasks = []
-    tasks.append(await cc.run_wait_ready())
-
     cc.add_mem_range(0, 0x1000, MEM_ADDR_TYPE.DRAM)
     cc.add_mem_range(0x1000, 0x1000, MEM_ADDR_TYPE.CXL_CACHED_BI)
 
@@ -168,75 +223,63 @@ async def test_cxl_host_cc_cache_invalid(cxl_host_cache_controller):
     mem_req = MemoryRequest(MEMORY_REQUEST_TYPE.WRITE, addr, 0x40, 0xDEADBEEFDEADBEEF)
     await cc._processor_to_cache_fifo.request.put(mem_req)
     cache_req = await cc._cache_to_coh_bridge_fifo.request.get()
-    await cc._cache_to_coh_bridge_fifo.response.put(CacheResponse(CACHE_RESPONSE_STATUS.RSP_I))
-    assert cache_req.type == CACHE_REQUEST_TYPE.SNP_INV
+    await cc._cache_to_coh_bridge_fifo.response.put(CACHE_RESP_RSP_I)
+    assert cache_req.type is CACHE_REQUEST_TYPE.SNP_INV
     await cc._processor_to_cache_fifo.response.get()
 
     addr = 0x1000
     mem_req = MemoryRequest(MEMORY_REQUEST_TYPE.WRITE, addr, 0x40, 0xDEADBEEFDEADBEEF)
     await cc._processor_to_cache_fifo.request.put(mem_req)
     cache_req = await cc._cache_to_coh_agent_fifo.request.get()
-    await cc._cache_to_coh_agent_fifo.response.put(CacheResponse(CACHE_RESPONSE_STATUS.RSP_I))
-    assert cache_req.type == CACHE_REQUEST_TYPE.SNP_INV
+    await cc._cache_to_coh_agent_fifo.response.put(CACHE_RESP_RSP_I)
+    assert cache_req.type is CACHE_REQUEST_TYPE.SNP_INV
     await cc._processor_to_cache_fifo.response.get()
 
-    await cc.stop()
-    asyncio.gather(*tasks)
-
 
-@pytest.mark.asyncio
 async def test_cxl_host_cc_cache_req(cxl_host_cache_controller):
     cc: CacheController
     cc = cxl_host_cache_controller
-    tasks = []
-    tasks.append(await cc.run_wait_ready())
-
     cc.add_mem_range(0x0, 0x1000, MEM_ADDR_TYPE.CXL_CACHED)
 
-    # Fill cache blocks
-    for i in range(CACHE_NUM_ASSOC):
-        addr = i * 0x40
-        req = MemoryRequest(MEMORY_REQUEST_TYPE.WRITE, addr, 0x40, 0x1111111111111111)
-        await send_cached_mem_request(cc, req, False)
+    # Fill cache blocks; each fill posts its request before its first suspension,
+    # so the controller still sees them in order
+    fill_reqs = [
+        MemoryRequest(MEMORY_REQUEST_TYPE.WRITE, i * 0x40, 0x40, 0x1111111111111111)
+        for i in range(CACHE_NUM_ASSOC)
+    ]
+    await asyncio.gather(*(send_cached_mem_request(cc, req, False) for req in fill_reqs))
 
     # SNP_DATA
     req = CacheRequest(CACHE_REQUEST_TYPE.SNP_DATA, 0, 0x40)
     resp = await send_cache_req(cc, req)
     # Data is now modified, should respond RSP_M
     # It will be translated to RSP_S_FWD_M in CacheDcoh
-    assert resp.status == CACHE_RESPONSE_STATUS.RSP_M
+    assert resp.status is CACHE_RESPONSE_STATUS.RSP_M
 
     # SNP_CUR
     req = CacheRequest(CACHE_REQUEST_TYPE.SNP_CUR, 0, 0x40)
     resp = await send_cache_req(cc, req)
-    assert resp.status == CACHE_RESPONSE_STATUS.RSP_V
+    assert resp.status is CACHE_RESPONSE_STATUS.RSP_V
 
     # WRITE_BACK
     req = CacheRequest(CACHE_REQUEST_TYPE.WRITE_BACK, 0, 0x40)
     resp = await send_cache_req(cc, req)
-    assert resp.status == CACHE_RESPONSE_STATUS.RSP_V
+    assert resp.status is CACHE_RESPONSE_STATUS.RSP_V
 
     # SNP_INV
     req = CacheRequest(CACHE_REQUEST_TYPE.SNP_INV, 0, 0x40)
     resp = await send_cache_req(cc, req)
-    assert resp.status == CACHE_RESPONSE_STATUS.RSP_I
+    assert resp.status is CACHE_RESPONSE_STATUS.RSP_I
 
     # cache miss
     req = CacheRequest(CACHE_REQUEST_TYPE.SNP_DATA, 0x1000, 0x40)
     resp = await send_cache_req(cc, req)
-    assert resp.status == CACHE_RESPONSE_STATUS.RSP_MISS
-
-    await cc.stop()
-    asyncio.gather(*tasks)
+    assert resp.status is CACHE_RESPONSE_STATUS.RSP_MISS
 
 
-@pytest.mark.asyncio
 async def test_cxl_host_cc_cxl_uncached(cxl_host_cache_controller):
     cc: CacheController
     cc = cxl_host_cache_controller
-    tasks = []
-    tasks.append(await cc.run_wait_ready())
-
     cc.add_mem_range(0x0, 0x1000, MEM_ADDR_TYPE.CXL_UNCACHED)
 
     addr = 0
@@ -247,11 +290,7 @@ async def test_cxl_host_cc_cxl_uncached(cxl_host_cache_controller):
     mem_req = MemoryRequest(MEMORY_REQUEST_TYPE.UNCACHED_READ, addr, 0x40)
     await send_uncached_mem_request(cc, mem_req)
 
-    await cc.stop()
-    asyncio.gather(*tasks)
-
 
-@pytest.mark.asyncio
 async def test_cxl_dcoh_cc_cache_req(cxl_dcoh_cache_controller):
     cc: CacheController
     cc = cxl_dcoh_cache_controller
@@ -261,13 +300,12 @@ async def test_cxl_dcoh_cc_cache_req(cxl_dcoh_cache_controller):
     # SNP_DATA
     req = CacheRequest(CACHE_REQUEST_TYPE.SNP_DATA, 0, 0x40)
     resp = await send_cache_req(cc, req)
-    assert resp.status == CACHE_RESPONSE_STATUS.RSP_MISS
+    assert resp.status is CACHE_RESPONSE_STATUS.RSP_MISS
 
     await cc.stop()
-    asyncio.gather(*tasks)
+    await asyncio.gather(*tasks)
 
 
-@pytest.mark.asyncio
 async def test_cxl_cache_controller_mem_range(cxl_host_cache_controller):
     cc: CacheController
     cc = cxl_host_cache_controller
@@ -278,12 +316,12 @@ async def test_cxl_cache_controller_mem_range(cxl_host_cache_controller):
 
     # valid + invalid "get"
     r = cc.get_mem_range(0x40)
-    assert r.addr_type == MEM_ADDR_TYPE.CXL_CACHED
+    assert r.addr_type is MEM_ADDR_TYPE.CXL_CACHED
     t = cc.get_mem_addr_type(0x40)
-    assert t == MEM_ADDR_TYPE.CXL_CACHED
+    assert t is MEM_ADDR_TYPE.CXL_CACHED
     cc.get_mem_range(0x2000)
     t = cc.get_mem_addr_type(0x2000)
-    assert t == MEM_ADDR_TYPE.OOB
+    assert t is MEM_ADDR_TYPE.OOB
 
     # valid + invalid "remove"
     cc.remove_mem_range(0x0, 0x100, MEM_ADDR_TYPE.CXL_CACHED)
@@ -5,8 +5,9 @@ This software is licensed under the terms of the Revised BSD License.
 See LICENSE for details.
 """
 
-from asyncio import create_task, gather
-from typing import List, Tuple, cast
+from asyncio import TaskGroup
+from operator import attrgetter
+from typing import Awaitable, Callable, List, Tuple, cast
 import pytest
 
 from opencis.util.logger import logger
@@ -119,6 +120,12 @@ def create_cxl_topology(bind: bool = False, memory_size: int = 0x100000) -> Tupl
     )
 
 
+# (bdf, class_code, memory_base, memory_limit) of an enumerated bridge
+get_bridge_info = attrgetter(
+    "bdf", "class_code", "mmio_range.memory_base", "mmio_range.memory_limit"
+)
+
+
 def compare_enum_info(enum1: EnumerationInfo, enum2: EnumerationInfo, check_len: bool = True):
     enum1_bridges = [item for item in enum1.get_all_devices() if item.is_bridge]
     enum2_bridges = [item for item in enum2.get_all_devices() if item.is_bridge]
@@ -126,11 +133,56 @@ def compare_enum_info(enum1: EnumerationInfo, enum2: EnumerationInfo, check_len:
     logger.info(f"[PyTest] Number of bridges from enum2: {len(enum2_bridges)}")
     if check_len:
         assert len(enum1_bridges) == len(enum2_bridges)
-    for _, (enum1_bridge, enum2_bridge) in enumerate(zip(enum1_bridges, enum2_bridges)):
-        assert enum1_bridge.bdf == enum2_bridge.bdf
-        assert enum1_bridge.class_code == enum2_bridge.class_code
-        assert enum1_bridge.mmio_range.memory_base == enum2_bridge.mmio_range.memory_base
-        assert enum1_bridge.mmio_range.memory_limit == enum2_bridge.mmio_range.memory_limit
+    for enum1_bridge, enum2_bridge in zip(enum1_bridges, enum2_bridges):
+        assert get_bridge_info(enum1_bridge) == get_bridge_info(enum2_bridge)
+
+
+class ComponentHarness:
+    def __init__(
+        self,
+        vcs: CxlVirtualSwitch,
+        physical_ports: List[CxlPortDevice],
+        cxl_devices: List[CxlType3Device],
+        ppb_bind_processors: List[PpbDspBindProcessor],
+        ppb_devices: List[PpbDevice],
+    ):
+        self._components = [
+            vcs,
+            *physical_ports,
+            *cxl_devices,
+            *ppb_bind_processors,
+            *ppb_devices,
+        ]
+
+    async def run(self):
+        async with TaskGroup() as tg:
+            for component in self._components:
+                tg.create_task(component.run())
+
+    async def wait_for_ready(self):
+        async with TaskGroup() as tg:
+            for component in self._components:
+                tg.create_task(component.wait_for_ready())
+
+    async def stop(self):
+        for component in self._components:
+            await component.stop()
+
+    async def run_test(self, test: Callable[[], Awaitable[None]]):
+        async def wait_and_test_and_stop():
+            await self.wait_for_ready()
+            exception = None
+            try:
+                await test()
+            except Exception as e:
+                exception = e
+            await self.stop()
+            if exception:
+                raise exception
+
+        async with TaskGroup() as tg:
+            tg.create_task(self.run())
+            tg.create_task(wait_and_test_and_stop())
 
 
 #
@@ -233,50 +285,17 @@ async def test_virtual_switch_manager_run_and_stop():
         allocated_ld=allocated_ld,
     )
 
-    async def start_components():
-        tasks = []
-        tasks.append(create_task(vcs.run()))
-        for port in physical_ports:
-            tasks.append(create_task(port.run()))
-        for ppb_bind_processor in ppb_bind_processors:
-            tasks.append(create_task(ppb_bind_processor.run()))
-        for ppb_device in ppb_devices:
-            tasks.append(create_task(ppb_device.run()))
-        await gather(*tasks)
-
-    async def stop_components():
-        await vcs.stop()
-        for port in physical_ports:
-            await port.stop()
-        for ppb_bind_processor in ppb_bind_processors:
-            await ppb_bind_processor.stop()
-        for ppb_device in ppb_devices:
-            await ppb_device.stop()
-
-    async def wait_and_stop():
-        wait_tasks = []
-        wait_tasks.append(create_task(vcs.wait_for_ready()))
-        for port in physical_ports:
-            wait_tasks.append(create_task(port.wait_for_ready()))
-        for ppb_bind_processor in ppb_bind_processors:
-            wait_tasks.append(create_task(ppb_bind_processor.wait_for_ready()))
-        for ppb_device in ppb_devices:
-            wait_tasks.append(create_task(ppb_device.wait_for_ready()))
-        await gather(*wait_tasks)
+    harness = ComponentHarness(vcs, physical_ports, [], ppb_bind_processors, ppb_devices)
 
+    async def test_bind_errors():
         with pytest.raises(Exception, match="port_index is out of bound"):
             await vcs.bind_vppb(port_index=4, vppb_index=1, ld_id=0)
         with pytest.raises(Exception, match="physical port 0 is not DSP"):
             await vcs.bind_vppb(port_index=0, vppb_index=1, ld_id=0)
         with pytest.raises(Exception, match="vPPB 4 is not bound to any physical port"):
             await vcs.unbind_vppb(vppb_index=4)
-        await stop_components()
 
-    tasks = [
-        create_task(start_components()),
-        create_task(wait_and_stop()),
-    ]
-    await gather(*tasks)
+    await harness.run_test(test_bind_errors)
 
 
 # Test initial bounds and runtime binding results are the same
@@ -284,101 +303,40 @@ async def test_virtual_switch_manager_run_and_stop():
 async def test_virtual_switch_manager_test_cxl_topology_bind_consistency():
     UnalignedBitStructure.make_quiet()
 
-    vcs = None
-    physical_ports = None
-    root_port_device = None
-    cxl_devices = None
-    ppb_devices = None
-    ppb_bind_processors = None
-
     base_address = 0xFE000000
 
-    enum_info_initial_bound = None
-    enum_info_runtime_binding = None
-
-    async def start_components():
-        tasks = []
-        tasks.append(create_task(vcs.run()))
-        for port in physical_ports:
-            tasks.append(create_task(port.run()))
-        for cxl_device in cxl_devices:
-            tasks.append(create_task(cxl_device.run()))
-        for ppb_bind_processor in ppb_bind_processors:
-            tasks.append(create_task(ppb_bind_processor.run()))
-        for ppb_device in ppb_devices:
-            tasks.append(create_task(ppb_device.run()))
-        await gather(*tasks)
-
-    async def stop_components():
-        await vcs.stop()
-        for port in physical_ports:
-            await port.stop()
-        for cxl_device in cxl_devices:
-            await cxl_device.stop()
-        for ppb_bind_processor in ppb_bind_processors:
-            await ppb_bind_processor.stop()
-        for ppb_device in ppb_devices:
-            await ppb_device.stop()
-
-    async def wait_and_test_and_stop(bind: bool = False):
-        wait_tasks = []
-        wait_tasks.append(create_task(vcs.wait_for_ready()))
-        for port in physical_ports:
-            wait_tasks.append(create_task(port.wait_for_ready()))
-        for cxl_device in cxl_devices:
-            wait_tasks.append(create_task(cxl_device.wait_for_ready()))
-        for ppb_bind_processor in ppb_bind_processors:
-            wait_tasks.append(create_task(ppb_bind_processor.wait_for_ready()))
-        for ppb_device in ppb_devices:
-            wait_tasks.append(create_task(ppb_device.wait_for_ready()))
-        await gather(*wait_tasks)
-
-        if bind:
-            await vcs.bind_vppb(1, 0, 0)
-            await vcs.bind_vppb(2, 1, 0)
-            await vcs.bind_vppb(3, 2, 0)
-        await root_port_device.enumerate(base_address)
-        if bind:
-            nonlocal enum_info_runtime_binding
-            enum_info_runtime_binding = await root_port_device.scan_devices()
-        else:
-            nonlocal enum_info_initial_bound
-            enum_info_initial_bound = await root_port_device.scan_devices()
-        await stop_components()
+    async def enumerate_and_scan(bind: bool) -> EnumerationInfo:
+        (
+            vcs,
+            physical_ports,
+            root_port_device,
+            cxl_devices,
+            _dsp_devices,
+            ppb_devices,
+            ppb_bind_processors,
+        ) = create_cxl_topology(bind=not bind)
+        harness = ComponentHarness(
+            vcs, physical_ports, cxl_devices, ppb_bind_processors, ppb_devices
+        )
+        enum_info = None
+
+        async def test_enumerate():
+            nonlocal enum_info
+            if bind:
+                await vcs.bind_vppb(1, 0, 0)
+                await vcs.bind_vppb(2, 1, 0)
+                await vcs.bind_vppb(3, 2, 0)
+            await root_port_device.enumerate(base_address)
+            enum_info = await root_port_device.scan_devices()
 
-    logger.info("[PyTest] Testing initial bounds")
-    (
-        vcs,
-        physical_ports,
-        root_port_device,
-        cxl_devices,
-        _dsp_devices,
-        ppb_devices,
-        ppb_bind_processors,
-    ) = create_cxl_topology(bind=True)
+        await harness.run_test(test_enumerate)
+        return enum_info
 
-    tasks = [
-        create_task(start_components()),
-        create_task(wait_and_test_and_stop(bind=False)),
-    ]
-    await gather(*tasks)
+    logger.info("[PyTest] Testing initial bounds")
+    enum_info_initial_bound = await enumerate_and_scan(bind=False)
 
     logger.info("[PyTest] Testing runtime binding")
-    (
-        vcs,
-        physical_ports,
-        root_port_device,
-        cxl_devices,
-        _dsp_devices,
-        ppb_devices,
-        ppb_bind_processors,
-    ) = create_cxl_topology(bind=False)
-
-    tasks = [
-        create_task(start_components()),
-        create_task(wait_and_test_and_stop(bind=True)),
-    ]
-    await gather(*tasks)
+    enum_info_runtime_binding = await enumerate_and_scan(bind=True)
 
     # Compare initial bound and runtime binding results
     compare_enum_info(enum_info_runtime_binding, enum_info_initial_bound)
@@ -424,52 +382,13 @@ async def test_virtual_switch_manager_test_cfg_routing():
             else:
                 logger.info("[PyTest] Received VID/DID: None")
 
-    async def start_components():
-        tasks = []
-        tasks.append(create_task(vcs.run()))
-        for port in physical_ports:
-            tasks.append(create_task(port.run()))
-        for cxl_device in cxl_devices:
-            tasks.append(create_task(cxl_device.run()))
-        for ppb_bind_processor in ppb_bind_processors:
-            tasks.append(create_task(ppb_bind_processor.run()))
-        for ppb_device in ppb_devices:
-            tasks.append(create_task(ppb_device.run()))
-        await gather(*tasks)
-
-    async def stop_components():
-        await vcs.stop()
-        for port in physical_ports:
-            await port.stop()
-        for cxl_device in cxl_devices:
-            await cxl_device.stop()
-        for ppb_bind_processor in ppb_bind_processors:
-            await ppb_bind_processor.stop()
-        for ppb_device in ppb_devices:
-            await ppb_device.stop()
-
-    async def wait_and_test_and_stop():
-        wait_tasks = []
-        wait_tasks.append(create_task(vcs.wait_for_ready()))
-        for port in physical_ports:
-            wait_tasks.append(create_task(port.wait_for_ready()))
-        for cxl_device in cxl_devices:
-            wait_tasks.append(create_task(cxl_device.wait_for_ready()))
-        for ppb_bind_processor in ppb_bind_processors:
-            wait_tasks.append(create_task(ppb_bind_processor.wait_for_ready()))
-        for ppb_device in ppb_devices:
-            wait_tasks.append(create_task(ppb_device.wait_for_ready()))
-        await gather(*wait_tasks)
+    harness = ComponentHarness(vcs, physical_ports, cxl_devices, ppb_bind_processors, ppb_devices)
 
+    async def test_body():
         await root_port_device.enumerate(base_address)
         await test_read_request(root_port_device)
-        await stop_components()
 
-    tasks = [
-        create_task(start_components()),
-        create_task(wait_and_test_and_stop()),
-    ]
-    await gather(*tasks)
+    await harness.run_test(test_body)
 
 
 @pytest.mark.asyncio
@@ -508,52 +427,13 @@ async def test_virtual_switch_manager_test_cfg_routing_oob():
             assert vid_did is None
             logger.info("[PyTest] Received expected unsupported completion")
 
-    async def start_components():
-        tasks = []
-        tasks.append(create_task(vcs.run()))
-        for port in physical_ports:
-            tasks.append(create_task(port.run()))
-        for cxl_device in cxl_devices:
-            tasks.append(create_task(cxl_device.run()))
-        for ppb_bind_processor in ppb_bind_processors:
-            tasks.append(create_task(ppb_bind_processor.run()))
-        for ppb_device in ppb_devices:
-            tasks.append(create_task(ppb_device.run()))
-        await gather(*tasks)
-
-    async def stop_components():
-        await vcs.stop()
-        for port in physical_ports:
-            await port.stop()
-        for cxl_device in cxl_devices:
-            await cxl_device.stop()
-        for ppb_bind_processor in ppb_bind_processors:
-            await ppb_bind_processor.stop()
-        for ppb_device in ppb_devices:
-            await ppb_device.stop()
-
-    async def wait_and_test_and_stop():
-        wait_tasks = []
-        wait_tasks.append(create_task(vcs.wait_for_ready()))
-        for port in physical_ports:
-            wait_tasks.append(create_task(port.wait_for_ready()))
-        for cxl_device in cxl_devices:
-            wait_tasks.append(create_task(cxl_device.wait_for_ready()))
-        for ppb_bind_processor in ppb_bind_processors:
-            wait_tasks.append(create_task(ppb_bind_processor.wait_for_ready()))
-        for ppb_device in ppb_devices:
-            wait_tasks.append(create_task(ppb_device.wait_for_ready()))
-        await gather(*wait_tasks)
+    harness = ComponentHarness(vcs, physical_ports, cxl_devices, ppb_bind_processors, ppb_devices)
 
+    async def test_body():
         await root_port_device.enumerate(base_address)
         await test_oob_request(root_port_device)
-        await stop_components()
 
-    tasks = [
-        create_task(start_components()),
-        create_task(wait_and_test_and_stop()),
-    ]
-    await gather(*tasks)
+    await harness.run_test(test_body)
 
 
 @pytest.mark.asyncio
@@ -598,58 +478,13 @@ async def test_virtual_switch_manager_test_mmio_routing():
             assert received_data == data
             logger.info(f"[PyTest] Received expected 0xdeadbeef from {address:08x}")
 
-    async def start_components():
-        tasks = []
-        tasks.append(create_task(vcs.run()))
-        for port in physical_ports:
-            tasks.append(create_task(port.run()))
-        for cxl_device in cxl_devices:
-            tasks.append(create_task(cxl_device.run()))
-        for ppb_bind_processor in ppb_bind_processors:
-            tasks.append(create_task(ppb_bind_processor.run()))
-        for ppb_device in ppb_devices:
-            tasks.append(create_task(ppb_device.run()))
-        await gather(*tasks)
-
-    async def stop_components():
-        await vcs.stop()
-        for port in physical_ports:
-            await port.stop()
-        for cxl_device in cxl_devices:
-            await cxl_device.stop()
-        for ppb_bind_processor in ppb_bind_processors:
-            await ppb_bind_processor.stop()
-        for ppb_device in ppb_devices:
-            await ppb_device.stop()
-
-    async def wait_and_test_and_stop():
-        wait_tasks = []
-        wait_tasks.append(create_task(vcs.wait_for_ready()))
-        for port in physical_ports:
-            wait_tasks.append(create_task(port.wait_for_ready()))
-        for cxl_device in cxl_devices:
-            wait_tasks.append(create_task(cxl_device.wait_for_ready()))
-        for ppb_bind_processor in ppb_bind_processors:
-            wait_tasks.append(create_task(ppb_bind_processor.wait_for_ready()))
-        for ppb_device in ppb_devices:
-            wait_tasks.append(create_task(ppb_device.wait_for_ready()))
-        await gather(*wait_tasks)
-
-        exception = None
-        try:
-            await root_port_device.enumerate(base_address)
-            await test_mmio_request(root_port_device, base_address)
-        except Exception as e:
-            exception = e
-        await stop_components()
-        if exception:
-            raise exception
-
-    tasks = [
-        create_task(start_components()),
-        create_task(wait_and_test_and_stop()),
-    ]
-    await gather(*tasks)
+    harness = ComponentHarness(vcs, physical_ports, cxl_devices, ppb_bind_processors, ppb_devices)
+
+    async def test_body():
+        await root_port_device.enumerate(base_address)
+        await test_mmio_request(root_port_device, base_address)
+
+    await harness.run_test(test_body)
 
 
 @pytest.mark.asyncio
@@ -715,58 +550,13 @@ async def test_virtual_switch_manager_test_mmio_routing_oob():
             assert data == 0
             logger.info(f"[PyTest] Received expected OOB from 0x{address:08x}")
 
-    async def start_components():
-        tasks = []
-        tasks.append(create_task(vcs.run()))
-        for port in physical_ports:
-            tasks.append(create_task(port.run()))
-        for cxl_device in cxl_devices:
-            tasks.append(create_task(cxl_device.run()))
-        for ppb_bind_processor in ppb_bind_processors:
-            tasks.append(create_task(ppb_bind_processor.run()))
-        for ppb_device in ppb_devices:
-            tasks.append(create_task(ppb_device.run()))
-        await gather(*tasks)
-
-    async def stop_components():
-        await vcs.stop()
-        for port in physical_ports:
-            await port.stop()
-        for cxl_device in cxl_devices:
-            await cxl_device.stop()
-        for ppb_bind_processor in ppb_bind_processors:
-            await ppb_bind_processor.stop()
-        for ppb_device in ppb_devices:
-            await ppb_device.stop()
-
-    async def wait_and_test_and_stop():
-        wait_tasks = []
-        wait_tasks.append(create_task(vcs.wait_for_ready()))
-        for port in physical_ports:
-            wait_tasks.append(create_task(port.wait_for_ready()))
-        for cxl_device in cxl_devices:
-            wait_tasks.append(create_task(cxl_device.wait_for_ready()))
-        for ppb_bind_processor in ppb_bind_processors:
-            wait_tasks.append(create_task(ppb_bind_processor.wait_for_ready()))
-        for ppb_device in ppb_devices:
-            wait_tasks.append(create_task(ppb_device.wait_for_ready()))
-        await gather(*wait_tasks)
-
-        exception = None
-        try:
-            mmio_enum_info = await root_port_device.enumerate(base_address)
-            await test_mmio_oob(root_port_device, mmio_enum_info)
-        except Exception as e:
-            exception = e
-        await stop_components()
-        if exception:
-            raise exception
-
-    tasks = [
-        create_task(start_components()),
-        create_task(wait_and_test_and_stop()),
-    ]
-    await gather(*tasks)
+    harness = ComponentHarness(vcs, physical_ports, cxl_devices, ppb_bind_processors, ppb_devices)
+
+    async def test_body():
+        mmio_enum_info = await root_port_device.enumerate(base_address)
+        await test_mmio_oob(root_port_device, mmio_enum_info)
+
+    await harness.run_test(test_body)
 
 
 @pytest.mark.asyncio
@@ -786,30 +576,6 @@ async def test_virtual_switch_manager_test_bind_and_unbind():
 
     base_address = 0xFE000000
 
-    async def start_components():
-        tasks = []
-        tasks.append(create_task(vcs.run()))
-        for port in physical_ports:
-            tasks.append(create_task(port.run()))
-        for cxl_device in cxl_devices:
-            tasks.append(create_task(cxl_device.run()))
-        for ppb_bind_processor in ppb_bind_processors:
-            tasks.append(create_task(ppb_bind_processor.run()))
-        for ppb_device in ppb_devices:
-            tasks.append(create_task(ppb_device.run()))
-        await gather(*tasks)
-
-    async def stop_components():
-        await vcs.stop()
-        for port in physical_ports:
-            await port.stop()
-        for cxl_device in cxl_devices:
-            await cxl_device.stop()
-        for ppb_bind_processor in ppb_bind_processors:
-            await ppb_bind_processor.stop()
-        for ppb_device in ppb_devices:
-            await ppb_device.stop()
-
     async def bind_vppbs(vcs: CxlVirtualSwitch):
         await vcs.bind_vppb(1, 0, 0)
         await vcs.bind_vppb(2, 1, 0)
@@ -820,42 +586,21 @@ async def test_virtual_switch_manager_test_bind_and_unbind():
         await vcs.unbind_vppb(1)
         await vcs.unbind_vppb(2)
 
-    async def wait_and_test_and_stop(vcs: CxlVirtualSwitch):
-        wait_tasks = []
-        wait_tasks.append(create_task(vcs.wait_for_ready()))
-        for port in physical_ports:
-            wait_tasks.append(create_task(port.wait_for_ready()))
-        for cxl_device in cxl_devices:
-            wait_tasks.append(create_task(cxl_device.wait_for_ready()))
-        for ppb_bind_processor in ppb_bind_processors:
-            wait_tasks.append(create_task(ppb_bind_processor.wait_for_ready()))
-        for ppb_device in ppb_devices:
-            wait_tasks.append(create_task(ppb_device.wait_for_ready()))
-        await gather(*wait_tasks)
-
-        exception = None
-        try:
-            await root_port_device.enumerate(base_address)
-            enum_info_before_bind = await root_port_device.scan_devices()
-
-            await bind_vppbs(vcs)
-            enum_info_after_bind = await root_port_device.scan_devices()
-            compare_enum_info(enum_info_before_bind, enum_info_after_bind, check_len=False)
-
-            await unbind_vppbs(vcs)
-            enum_info_after_unbind = await root_port_device.scan_devices()
-            compare_enum_info(enum_info_after_bind, enum_info_after_unbind, check_len=False)
-        except Exception as e:
-            exception = e
-        await stop_components()
-        if exception:
-            raise exception
-
-    tasks = [
-        create_task(start_components()),
-        create_task(wait_and_test_and_stop(vcs)),
-    ]
-    await gather(*tasks)
+    harness = ComponentHarness(vcs, physical_ports, cxl_devices, ppb_bind_processors, ppb_devices)
+
+    async def test_body():
+        await root_port_device.enumerate(base_address)
+        enum_info_before_bind = await root_port_device.scan_devices()
+
+        await bind_vppbs(vcs)
+        enum_info_after_bind = await root_port_device.scan_devices()
+        compare_enum_info(enum_info_before_bind, enum_info_after_bind, check_len=False)
+
+        await unbind_vppbs(vcs)
+        enum_info_after_unbind = await root_port_device.scan_devices()
+        compare_enum_info(enum_info_after_bind, enum_info_after_unbind, check_len=False)
+
+    await harness.run_test(test_body)
 
 
 @pytest.mark.asyncio
@@ -875,30 +620,6 @@ async def test_virtual_switch_manager_test_cxl_mem():
 
     base_address = 0xFE000000
 
-    async def start_components():
-        tasks = []
-        tasks.append(create_task(vcs.run()))
-        for port in physical_ports:
-            tasks.append(create_task(port.run()))
-        for cxl_device in cxl_devices:
-            tasks.append(create_task(cxl_device.run()))
-        for ppb_bind_processor in ppb_bind_processors:
-            tasks.append(create_task(ppb_bind_processor.run()))
-        for ppb_device in ppb_devices:
-            tasks.append(create_task(ppb_device.run()))
-        await gather(*tasks)
-
-    async def stop_components():
-        await vcs.stop()
-        for port in physical_ports:
-            await port.stop()
-        for cxl_device in cxl_devices:
-            await cxl_device.stop()
-        for ppb_bind_processor in ppb_bind_processors:
-            await ppb_bind_processor.stop()
-        for ppb_device in ppb_devices:
-            await ppb_device.stop()
-
     async def bind_vppbs(vcs: CxlVirtualSwitch):
         await vcs.bind_vppb(1, 0, 0)
         await vcs.bind_vppb(2, 1, 0)
@@ -909,55 +630,34 @@ async def test_virtual_switch_manager_test_cxl_mem():
         await vcs.unbind_vppb(1)
         await vcs.unbind_vppb(2)
 
-    async def wait_and_test_and_stop(vcs: CxlVirtualSwitch):
-        wait_tasks = []
-        wait_tasks.append(create_task(vcs.wait_for_ready()))
-        for port in physical_ports:
-            wait_tasks.append(create_task(port.wait_for_ready()))
-        for cxl_device in cxl_devices:
-            wait_tasks.append(create_task(cxl_device.wait_for_ready()))
-        for ppb_bind_processor in ppb_bind_processors:
-            wait_tasks.append(create_task(ppb_bind_processor.wait_for_ready()))
-        for ppb_device in ppb_devices:
-            wait_tasks.append(create_task(ppb_device.wait_for_ready()))
-        await gather(*wait_tasks)
-
-        exception = None
-        try:
-            await bind_vppbs(vcs)
-            await root_port_device.enumerate(base_address)
-            enum_info_after_bind = await root_port_device.scan_devices()
-
-            usp = enum_info_after_bind.devices[0]
-            await root_port_device.enable_hdm_decoder(usp)
-
-            cxl_hpa_base = 0x100000000
-            await root_port_device.configure_hdm_decoder_single_device(usp, cxl_hpa_base)
-
-            usp_cxl_devices = usp.get_all_cxl_devices()
-            test_address = cxl_hpa_base
-            for cxl_device in usp_cxl_devices:
-                await root_port_device.cxl_mem_write(test_address, 0xDEADBEEF)
-                data = await root_port_device.cxl_mem_read(test_address)
-                assert data is not None, f"Failed to read from 0x{test_address:x}"
-                logger.info(f"[PyTest] CXL.mem Read: 0x{data:x} from 0x{test_address:x}")
-                test_address += cxl_device.cxl_device_size
-            for cxl_device in usp_cxl_devices:
-                await root_port_device.cxl_mem_birsp(CXL_MEM_M2SBIRSP_OPCODE.BIRSP_E, bi_id=3)
-                await root_port_device.cxl_mem_birsp(CXL_MEM_M2SBIRSP_OPCODE.BIRSP_E, bi_id=4)
-                await root_port_device.cxl_mem_birsp(CXL_MEM_M2SBIRSP_OPCODE.BIRSP_E, bi_id=5)
-
-            await unbind_vppbs(vcs)
-            enum_info_after_unbind = await root_port_device.scan_devices()
-            compare_enum_info(enum_info_after_unbind, enum_info_after_bind, check_len=False)
-        except Exception as e:
-            exception = e
-        await stop_components()
-        if exception:
-            raise exception
-
-    tasks = [
-        create_task(start_components()),
-        create_task(wait_and_test_and_stop(vcs)),
-    ]
-    await gather(*tasks)
+    harness = ComponentHarness(vcs, physical_ports, cxl_devices, ppb_bind_processors, ppb_devices)
+
+    async def test_body():
+        await bind_vppbs(vcs)
+        await root_port_device.enumerate(base_address)
+        enum_info_after_bind = await root_port_device.scan_devices()
+
+        usp = enum_info_after_bind.devices[0]
+        await root_port_device.enable_hdm_decoder(usp)
+
+        cxl_hpa_base = 0x100000000
+        await root_port_device.configure_hdm_decoder_single_device(usp, cxl_hpa_base)
+
+        usp_cxl_devices = usp.get_all_cxl_devices()
+        test_address = cxl_hpa_base
+        for cxl_device in usp_cxl_devices:
+            await root_port_device.cxl_mem_write(test_address, 0xDEADBEEF)
+            data = await root_port_device.cxl_mem_read(test_address)
+            assert data is not None, f"Failed to read from 0x{test_address:x}"
+            logger.info(f"[PyTest] CXL.mem Read: 0x{data:x} from 0x{test_address:x}")
+            test_address += cxl_device.cxl_device_size
+        for cxl_device in usp_cxl_devices:
+            await root_port_device.cxl_mem_birsp(CXL_MEM_M2SBIRSP_OPCODE.BIRSP_E, bi_id=3)
+            await root_port_device.cxl_mem_birsp(CXL_MEM_M2SBIRSP_OPCODE.BIRSP_E, bi_id=4)
+            await root_port_device.cxl_mem_birsp(CXL_MEM_M2SBIRSP_OPCODE.BIRSP_E, bi_id=5)
+
+        await unbind_vppbs(vcs)
+        enum_info_after_unbind = await root_port_device.scan_devices()
+        compare_enum_info(enum_info_after_unbind, enum_info_after_bind, check_len=False)
+
+    await harness.run_test(test_body)
@@ -103,6 +103,19 @@ def test_shareable_bytearray():
     assert bytes(shared_copy) != bytes(shared)
 
 
+def test_shareable_bytearray_copy_from():
+    data_array = bytearray(8)
+    shared = ShareableByteArray(len(data_array), data_array)
+    shared_upper = shared.create_shared(4, 4)
+
+    shared_upper.copy_from(bytes([0xDE, 0xAD]), 1)
+    assert data_array == bytearray([0, 0, 0, 0, 0, 0xDE, 0xAD, 0])
+
+    with pytest.raises(IndexError):
+        shared_upper.copy_from(bytes([0xBE, 0xEF]), 3)
+    assert len(data_array) == 8
+
+
 def test_literally_unaligned_bit_structure():
     # pylint: disable=unused-variable
     with pytest.raises(